@@ -1,40 +1,23 @@
-import os
+from record_store import RecordStore, load_record_store
+from instrumentation import traced
 from log_analyzer import LogAnalyzer
 
 
 # process the analyzation with artificial intelligence.
-def analyze_with_ai(base_path: str) -> dict:
+# the logs come from the record store, so a summary that already scanned the folders does not read them again.
+@traced("analyze_with_ai")
+def analyze_with_ai(base_path: str, store: RecordStore = None) -> dict:
     """Analyzation with AI insigths."""
     ai_analyzer = LogAnalyzer()
 
     # collect logs from different sources.
-    ec2_logs = []
-    rds_logs = []
-    promotexter_logs = []
-
-    # read ec2 logs.
-    ec2_path = os.path.join(base_path, "Ec2 raw records")
-    if os.path.exists(ec2_path):
-        for filename in os.listdir(ec2_logs):
-            if filename.endswith(".csv"):
-                with open(os.path.join(ec2_logs, filename), "r") as f:
-                    ec2_logs.extend(f.readlines())
+    if store is None:
+        store = load_record_store(base_path)
 
-    # read the rds logs.
-    rds_path = os.path.join(base_path, "RDS Records")
-    if os.path.exists(rds_path):
-        for filename in os.listdir(rds_path):
-            if filename.endswith(".csv"):
-                with open(os.path.join(rds_path, filename), "r") as f:
-                    rds_logs.extend(f.readlines())
-
-    # read the promotexter logs.
-    promotexter_path = os.path.join(base_path, "Promotexter records")
-    if os.path.exists(promotexter_path):
-        for filename in os.listdir(promotexter_path):
-            if filename.endswith(".csv"):
-                with open(os.path.join(promotexter_path, filename), "r") as f:
-                    promotexter_logs.extend(f.readlines())
+    # the raw ec2 logs are only counted by the record store, they are not part of the analysis.
+    ec2_logs = []
+    rds_logs = store.all_lines(store.rds)
+    promotexter_logs = store.all_lines(store.promotexter)
 
     # get the AI insights
     return ai_analyzer.get_ai_insights(ec2_logs, rds_logs, promotexter_logs)
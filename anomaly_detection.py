@@ -0,0 +1,207 @@
+import math
+from bisect import bisect_left, insort
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from instrumentation import traced
+
+# the bucket sizes, in seconds, that the volumes can be counted at.
+RESOLUTIONS = {"minute": 60, "5min": 300, "hour": 3600}
+
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+# scales the median absolute deviation to the standard deviation of normal data.
+MAD_SCALE = 0.6745
+
+
+def _resolution_size(resolution: str) -> int:
+    if resolution not in RESOLUTIONS:
+        raise ValueError(
+            f"Unknown resolution {resolution!r}, expected one of {list(RESOLUTIONS)}"
+        )
+    return RESOLUTIONS[resolution]
+
+
+def bucket_index(ts: datetime, resolution: str = "hour") -> int:
+    """Return the number of the bucket a timestamp falls in, counted from the epoch."""
+    seconds = (ts.toordinal() - EPOCH_ORDINAL) * 86400 + (
+        ts.hour * 3600 + ts.minute * 60 + ts.second
+    )
+    return seconds // _resolution_size(resolution)
+
+
+def _bucket_starts(first: int, count: int, size: int) -> List[datetime]:
+    epoch = datetime(1970, 1, 1)
+    return [epoch + timedelta(seconds=(first + i) * size) for i in range(count)]
+
+
+def fill_buckets(
+    counts: Dict[int, int], resolution: str = "hour"
+) -> Tuple[List[datetime], List[int]]:
+    """Turn volumes counted per bucket index into the start times and volumes of the whole range.
+
+    Buckets without traffic are filled in with a volume of 0. The counts can
+    come from bucket_index, so partial counts of several shards can be added
+    up before the range is filled.
+    """
+    size = _resolution_size(resolution)
+    counts = {bucket: volume for bucket, volume in counts.items() if volume}
+    if not counts:
+        return [], []
+    first = min(counts)
+    volumes = [counts.get(bucket, 0) for bucket in range(first, max(counts) + 1)]
+    return _bucket_starts(first, len(volumes), size), volumes
+
+
+def bucket_volumes(
+    timestamps: Iterable[datetime], resolution: str = "hour"
+) -> Tuple[List[datetime], List[int]]:
+    """Count the timestamps per bucket over their whole range.
+
+    Buckets without traffic are kept with a volume of 0, so every volume
+    has its real bucket start time, even across days or weeks. A numpy
+    datetime64 array is counted with bincount.
+    """
+    size = _resolution_size(resolution)
+
+    if hasattr(timestamps, "dtype"):
+        import numpy as np
+
+        seconds = timestamps[~np.isnat(timestamps)].astype("datetime64[s]")
+        if seconds.size == 0:
+            return [], []
+        buckets = seconds.astype(np.int64) // size
+        first = int(buckets.min())
+        volumes = np.bincount(buckets - first).tolist()
+        return _bucket_starts(first, len(volumes), size), volumes
+
+    return fill_buckets(
+        Counter(bucket_index(ts, resolution) for ts in timestamps if ts), resolution
+    )
+
+
+def rolling_mad_anomalies(
+    volumes: List[int], threshold: float = 3.5, window: int = 24
+) -> List[Tuple[int, float]]:
+    """Return (index, score) for the volumes far from the median of the window before them.
+
+    The score is the robust z-score against the window median and MAD. The
+    window is kept sorted, so the median costs O(log window), and the MAD is
+    only computed for the few volumes that could pass the threshold. The MAD
+    is never below 1 because the volumes are counts, so a flat baseline does
+    not turn every small change into an anomaly.
+    """
+    anomalies = []
+    history = deque()
+    ordered = []
+    for i, volume in enumerate(volumes):
+        if len(ordered) >= 2:
+            median = _median(ordered)
+            # the MAD is at least 1, so this bounds the score from above.
+            if MAD_SCALE * abs(volume - median) > threshold:
+                mad = _median(sorted(abs(value - median) for value in ordered))
+                score = MAD_SCALE * abs(volume - median) / max(mad, 1.0)
+                if score > threshold:
+                    anomalies.append((i, score))
+
+        history.append(volume)
+        insort(ordered, volume)
+        if len(history) > window:
+            del ordered[bisect_left(ordered, history.popleft())]
+    return anomalies
+
+
+def ewma_anomalies(
+    volumes: List[int], threshold: float = 3.5, alpha: float = 0.3, min_periods: int = 3
+) -> List[Tuple[int, float]]:
+    """Return (index, score) for the volumes far from the exponentially weighted mean before them.
+
+    The score is a z-score against the EWMA mean and variance, in one O(n) pass.
+    """
+    anomalies = []
+    mean = float(volumes[0]) if volumes else 0.0
+    variance = 0.0
+    for i, volume in enumerate(volumes):
+        difference = volume - mean
+        if i >= min_periods:
+            score = abs(difference) / max(math.sqrt(variance), 1.0)
+            if score > threshold:
+                anomalies.append((i, score))
+        mean += alpha * difference
+        variance = (1 - alpha) * (variance + alpha * difference * difference)
+    return anomalies
+
+
+@traced("dbscan", count_lines=lambda result: len(result[0]))
+def dbscan_scores(volumes: List[int]) -> Tuple[List[float], List[bool]]:
+    """Return the scaled volumes and the DBSCAN noise flags, the original per-hour detector."""
+    import numpy as np
+    from sklearn.cluster import DBSCAN
+    from sklearn.preprocessing import StandardScaler
+
+    X_scaled = StandardScaler().fit_transform(np.array(volumes).reshape(-1, 1))
+    clustering = DBSCAN(eps=0.5, min_samples=2).fit(X_scaled)
+    return [float(x[0]) for x in X_scaled], [
+        label == -1 for label in clustering.labels_
+    ]
+
+
+def score_volumes(
+    volumes: List[int], method: str = "mad", threshold: float = 3.5, **options
+) -> List[Tuple[int, float]]:
+    """Return (index, deviation) for every anomalous volume.
+
+    method is "mad" (rolling median/MAD), "ewma" (EWMA z-score) or "dbscan".
+    For dbscan the threshold is not used, the noise points are the anomalies.
+    """
+    if len(volumes) < 2:
+        return []
+
+    if method == "dbscan":
+        scaled, noise = dbscan_scores(volumes)
+        return [(i, abs(scaled[i])) for i in range(len(volumes)) if noise[i]]
+    if method == "mad":
+        return rolling_mad_anomalies(volumes, threshold, **options)
+    if method == "ewma":
+        return ewma_anomalies(volumes, threshold, **options)
+    raise ValueError(f"Unknown anomaly method {method!r}")
+
+
+def detect_volume_anomalies(
+    timestamps: Iterable[datetime],
+    resolution: str = "hour",
+    method: str = "mad",
+    threshold: float = 3.5,
+    **options,
+) -> List[Dict]:
+    """Bucket the timestamps and return the anomalous buckets, largest deviation first."""
+    starts, volumes = bucket_volumes(timestamps, resolution)
+    return _anomalous_buckets(starts, volumes, method, threshold, **options)
+
+
+def detect_bucket_anomalies(
+    counts: Dict[int, int],
+    resolution: str = "hour",
+    method: str = "mad",
+    threshold: float = 3.5,
+    **options,
+) -> List[Dict]:
+    """Return the anomalous buckets of volumes counted per bucket index, see fill_buckets."""
+    starts, volumes = fill_buckets(counts, resolution)
+    return _anomalous_buckets(starts, volumes, method, threshold, **options)
+
+
+def _anomalous_buckets(starts, volumes, method, threshold, **options) -> List[Dict]:
+    anomalies = [
+        {"timestamp": starts[i], "volume": volumes[i], "deviation": deviation}
+        for i, deviation in score_volumes(volumes, method, threshold, **options)
+    ]
+    return sorted(anomalies, key=lambda x: x["deviation"], reverse=True)
+
+
+def _median(ordered: List[float]) -> float:
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
@@ -0,0 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# how many files are opened and read at the same time, enough to hide the latency of a network share.
+DEFAULT_CONCURRENCY = 8
+
+
+# function to apply a file reading function to many files at once, on a thread pool of concurrency threads.
+# the results are returned in the order of the items, whichever call finishes first.
+# with a concurrency of 1 (or None) the files are read one after the other on the calling thread.
+def map_files(function, items, concurrency=DEFAULT_CONCURRENCY):
+    items = list(items)
+    if not concurrency or concurrency <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        return list(executor.map(function, items))
@@ -0,0 +1,151 @@
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from create_summary import build_summary_with_totals, save_summary
+
+# the totals that are added up over the days, the error categories are added per category.
+SUMMED_TOTALS = [
+    "successful_transactions",
+    "failed_transactions",
+    "sms_sent",
+    "sms_failed",
+    "duplicate_transactions",
+    "sms_without_rds",
+    "rds_without_sms",
+]
+
+
+# function to expand a list of day folders and glob patterns into the sorted list of existing folders.
+# a folder given twice, such as "logs/2024-11-20" and its absolute path, is only kept once.
+def expand_day_folders(patterns):
+    folders = {}
+    for pattern in patterns:
+        matches = glob.glob(pattern) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            if os.path.isdir(match):
+                folders.setdefault(os.path.abspath(match), os.path.normpath(match))
+    return sorted(folders.values())
+
+
+# function to name a day after its folder, "logs/2024-11-20" is the day "2024-11-20".
+def day_label(day_folder):
+    return os.path.basename(os.path.normpath(day_folder))
+
+
+# function to name every day folder, the labels are used as report file names so they must not repeat.
+# folders with the same name get their parent folders in front until the labels differ,
+# "siteA/2024-11-20" and "siteB/2024-11-20" are the days "siteA_2024-11-20" and "siteB_2024-11-20".
+def day_labels(day_folders):
+    parts = {
+        folder: [part for part in os.path.abspath(folder).split(os.sep) if part]
+        for folder in day_folders
+    }
+    depths = {folder: 1 for folder in day_folders}
+    while True:
+        labels = {
+            folder: "_".join(parts[folder][-depths[folder] :]) for folder in day_folders
+        }
+        folders_by_label = {}
+        for folder, label in labels.items():
+            folders_by_label.setdefault(label, []).append(folder)
+        duplicates = [
+            folder
+            for folders in folders_by_label.values()
+            if len(folders) > 1
+            for folder in folders
+            if depths[folder] < len(parts[folder])
+        ]
+        if not duplicates:
+            return [labels[folder] for folder in day_folders]
+        for folder in duplicates:
+            depths[folder] += 1
+
+
+# function run inside a worker, it writes the report of one day and returns its totals.
+def summarize_day(documentation_folder, day_folder, label=None):
+    if label is None:
+        label = day_label(day_folder)
+    summary, totals = build_summary_with_totals(day_folder)
+    report_path = save_summary(summary, documentation_folder, label)
+    return label, report_path, totals
+
+
+# function to add the totals of the days into the totals of the whole period.
+def merge_totals(all_totals):
+    rollup = {name: 0 for name in SUMMED_TOTALS}
+    rollup["error_categories"] = {}
+    for totals in all_totals:
+        for name in SUMMED_TOTALS:
+            rollup[name] += totals[name]
+        for category, count in totals["error_categories"].items():
+            rollup["error_categories"][category] = (
+                rollup["error_categories"].get(category, 0) + count
+            )
+    return rollup
+
+
+# function to build the lines of the rollup report from the totals of every day.
+def build_rollup(days):
+    first, last = days[0][0], days[-1][0]
+    rollup = merge_totals([totals for _, _, totals in days])
+    summary = [f"**Rollup Report for {first} to {last}** ({len(days)} day(s))"]
+
+    summary.append("\n-------------------------Per Day-------------------------\n")
+    for label, _, totals in days:
+        summary.append(
+            f"{label}: {totals['successful_transactions']} successful, "
+            f"{totals['failed_transactions']} failed, "
+            f"{totals['sms_sent']} SMS sent, "
+            f"{totals['sms_failed']} failed to send SMS"
+        )
+
+    summary.append("\n-------------------------Overview-------------------------")
+    summary.append(
+        f"\nTotal Records from Audtrail: "
+        f"{rollup['successful_transactions'] + rollup['failed_transactions']}"
+    )
+    summary.append(
+        f"UBP Successful Transaction(s): {rollup['successful_transactions']}"
+    )
+    summary.append(f"Sent SMS from Promotexter:{rollup['sms_sent']}")
+    summary.append(f"Failed to send SMS: {rollup['sms_failed']}")
+    summary.append(
+        f"\nUBP Failed Transactions: {rollup['failed_transactions']} transaction(s)"
+    )
+    for category, count in rollup["error_categories"].items():
+        summary.append(f"{category} - {count}")
+
+    summary.append(f"\nDuplicate Transactions: {rollup['duplicate_transactions']}")
+    summary.append(
+        f"SMS sent without a successful RDS transaction: {rollup['sms_without_rds']}"
+    )
+    summary.append(
+        f"Successful RDS transactions without an SMS: {rollup['rds_without_sms']}"
+    )
+    return summary
+
+
+# function to write a report for every day folder and a rollup report for the whole period.
+# every day is summarized in its own worker process, with workers set to 1 the days are summarized one by one.
+# returns the paths of the day reports, in day order, and the path of the rollup report.
+def write_batch_summary(day_folders, documentation_folder, workers=None):
+    day_folders = expand_day_folders(day_folders)
+    if not day_folders:
+        raise ValueError("No day folders to summarize")
+
+    labels = day_labels(day_folders)
+    summarize = partial(summarize_day, documentation_folder)
+    if workers == 1 or len(day_folders) == 1:
+        days = [summarize(*day) for day in zip(day_folders, labels)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            days = list(executor.map(summarize, day_folders, labels))
+
+    rollup_path = save_summary(
+        build_rollup(days),
+        documentation_folder,
+        f"{days[0][0]}_to_{days[-1][0]}",
+    )
+    return [report_path for _, report_path, _ in days], rollup_path
@@ -0,0 +1,393 @@
+import argparse
+import glob
+import importlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from instrumentation import peak_rss_mb
+
+# the stages in the order they run, the later stages read the outputs of the processors.
+STAGES = [
+    "fund_transfer",
+    "rds",
+    "promotexter",
+    "extract_ec2_errors",
+    "extract_rds_errors",
+    "ai_insights",
+]
+
+# the file every stage reads, relative to the dataset folder.
+STAGE_INPUTS = {
+    "fund_transfer": ["fund_transfer_logs.txt"],
+    "rds": ["rds_logs.csv"],
+    "promotexter": ["promotexter_logs.txt"],
+    "extract_ec2_errors": ["Ec2 Failed Transactions", "*.csv"],
+    "extract_rds_errors": ["RDS Records", "RDS Failed Transactions", "*.csv"],
+}
+
+# the modules every stage needs, including the ones it only loads on its first run.
+STAGE_MODULES = {
+    "fund_transfer": ["process_fund_transfer_logs"],
+    "rds": ["process_rds_logs"],
+    "promotexter": ["process_promotexter_logs"],
+    "extract_ec2_errors": ["extract_ec2_errors"],
+    "extract_rds_errors": ["extract_rds_errors"],
+    "ai_insights": [
+        "analyze_with_ai",
+        "record_store",
+        "numpy",
+        "sklearn.cluster",
+        "sklearn.preprocessing",
+    ],
+}
+
+# every stage runs at least this many times, and until this many seconds were measured.
+DEFAULT_REPEATS = 3
+DEFAULT_MIN_SECONDS = 1.0
+MAX_RUNS = 100
+
+# the summary (and so the GUI) must not load these when it is imported, they are only needed by the analysis
+# or, like asyncio, cost more to import than the little they would be used for.
+HEAVY_MODULES = ["numpy", "sklearn", "pandas", "asyncio"]
+# how long importing the summary may take, in seconds, about three times what it takes now.
+IMPORT_BUDGET_SECONDS = 0.2
+IMPORT_RUNS = 3
+
+# a stage is a regression when it is this much slower (lines/sec) or bigger (peak RSS) than the baseline.
+DEFAULT_TOLERANCE = 0.20
+
+
+def _only_file(pattern):
+    return glob.glob(pattern)[0]
+
+
+# function to find the file a stage reads, the ai_insights stage reads the whole folder.
+def _stage_input(stage, folder):
+    return _only_file(os.path.join(folder, *STAGE_INPUTS[stage]))
+
+
+# function to run one stage on a dataset folder.
+def _run_stage(stage, folder, workers):
+    if stage == "fund_transfer":
+        from process_fund_transfer_logs import process_fund_transfer_logs
+
+        process_fund_transfer_logs(_stage_input(stage, folder), workers=workers)
+    elif stage == "rds":
+        from process_rds_logs import process_rds_logs
+
+        process_rds_logs(_stage_input(stage, folder), workers=workers)
+    elif stage == "promotexter":
+        from process_promotexter_logs import process_promotexter_data
+
+        process_promotexter_data(_stage_input(stage, folder), workers=workers)
+    elif stage == "extract_ec2_errors":
+        from extract_ec2_errors import extract_ec2_errors
+
+        extract_ec2_errors(_stage_input(stage, folder))
+    elif stage == "extract_rds_errors":
+        from extract_rds_errors import extract_rds_errors
+
+        extract_rds_errors(_stage_input(stage, folder))
+    elif stage == "ai_insights":
+        from analyze_with_ai import analyze_with_ai
+        from record_store import load_record_store
+
+        analyze_with_ai(folder, load_record_store(folder))
+    else:
+        raise ValueError(f"Unknown stage {stage!r}, expected one of {STAGES}")
+
+
+# function to count the input lines a stage goes through, outside of the timed runs.
+def _stage_lines(stage, folder):
+    from record_store import count_lines, load_record_store
+
+    if stage == "ai_insights":
+
+        store = load_record_store(folder)
+        return sum(log_file.line_count for log_file in store.rds + store.promotexter)
+    return count_lines(_stage_input(stage, folder))
+
+
+# function run in a fresh process for every stage, so the peak memory belongs to that stage alone.
+# the processing modules are only imported inside the functions of this file, so they are not loaded yet.
+# the modules of the stage are imported first and timed on their own, then the stage runs at least
+# repeats times and until min_seconds were measured, and the best run is kept.
+def _measure_stage(stage, folder, workers, repeats, min_seconds):
+    start = time.perf_counter()
+    for module in STAGE_MODULES[stage]:
+        importlib.import_module(module)
+    import_seconds = time.perf_counter() - start
+
+    timings = []
+    while len(timings) < repeats or (
+        sum(timings) < min_seconds and len(timings) < MAX_RUNS
+    ):
+        start = time.perf_counter()
+        _run_stage(stage, folder, workers)
+        timings.append(time.perf_counter() - start)
+
+    lines = _stage_lines(stage, folder)
+    seconds = min(timings)
+    return {
+        "lines": lines,
+        "seconds": seconds,
+        "median_seconds": statistics.median(timings),
+        "runs": len(timings),
+        "measured_seconds": sum(timings),
+        "import_seconds": import_seconds,
+        "lines_per_second": lines / seconds if seconds else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# function to generate a dataset and measure every stage on it.
+# returns the results per stage in stage order, with the settings of the run.
+# a temporary dataset folder is removed afterwards, a given folder is kept.
+def run_benchmark(
+    size="10k",
+    seed=0,
+    folder=None,
+    workers=None,
+    stages=None,
+    repeats=DEFAULT_REPEATS,
+    min_seconds=DEFAULT_MIN_SECONDS,
+):
+    from synthetic_logs import generate_dataset
+
+    temporary = folder is None
+    if temporary:
+        folder = tempfile.mkdtemp(prefix="codexcope-benchmark-")
+
+    results = {}
+    try:
+        generate_dataset(folder, size, seed)
+        for stage in stages or STAGES:
+            # spawn gives every stage a clean interpreter, a forked one would inherit the memory of the parent.
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=get_context("spawn")
+            ) as executor:
+                results[stage] = executor.submit(
+                    _measure_stage, stage, folder, workers, repeats, min_seconds
+                ).result()
+    finally:
+        if temporary:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    return {
+        "size": size,
+        "seed": seed,
+        "workers": workers,
+        "repeats": repeats,
+        "min_seconds": min_seconds,
+        "folder": None if temporary else folder,
+        "stages": results,
+    }
+
+
+# function to import a module in fresh interpreters, returns the best import time and the heavy modules it loaded.
+def measure_import(module="create_summary", runs=IMPORT_RUNS):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        "print(' '.join(sys.modules))\n"
+    )
+    best = None
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.splitlines()
+        seconds = float(output[0])
+        best = seconds if best is None else min(best, seconds)
+    loaded = set(output[1].split())
+    return best, [name for name in HEAVY_MODULES if name in loaded]
+
+
+# function to check that importing a module loads none of the heavy modules and stays within the budget.
+# returns one message per problem.
+def check_import_budget(module="create_summary", budget=IMPORT_BUDGET_SECONDS):
+    seconds, loaded = measure_import(module)
+    problems = [f"import {module} loads {name}" for name in loaded]
+    if seconds > budget:
+        problems.append(f"import {module} takes {seconds:.3f}s, budget {budget:.3f}s")
+    return seconds, problems
+
+
+# function to compare the results of a run with a baseline.
+# returns one message per regression, a stage is compared on its best lines/sec and its peak RSS.
+# a stage measured for less than min_seconds in the run or the baseline is too noisy to compare and is skipped.
+def find_regressions(
+    results, baseline, tolerance=DEFAULT_TOLERANCE, min_seconds=DEFAULT_MIN_SECONDS
+):
+    regressions = []
+    for stage, result in results["stages"].items():
+        reference = baseline["stages"].get(stage)
+        if reference is None:
+            continue
+        if (
+            min(
+                result.get("measured_seconds", result["seconds"]),
+                reference.get("measured_seconds", reference["seconds"]),
+            )
+            < min_seconds
+        ):
+            continue
+
+        if result["lines_per_second"] < reference["lines_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{stage}: {result['lines_per_second']:,.0f} lines/sec, "
+                f"baseline {reference['lines_per_second']:,.0f}"
+            )
+        if (
+            result["peak_rss_mb"] is not None
+            and reference["peak_rss_mb"] is not None
+            and result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{stage}: peak RSS {result['peak_rss_mb']:,.1f} MB, "
+                f"baseline {reference['peak_rss_mb']:,.1f} MB"
+            )
+    return regressions
+
+
+def format_results(results):
+    lines = [
+        f"size {results['size']}, seed {results['seed']}, workers {results['workers']}, "
+        f"best of at least {results['repeats']} runs and {results['min_seconds']}s",
+        f"{'stage':<20} {'lines':>12} {'seconds':>9} {'median':>9} {'runs':>5} "
+        f"{'import s':>9} {'lines/sec':>12} {'peak RSS MB':>12}",
+    ]
+    for stage, result in results["stages"].items():
+        peak = result["peak_rss_mb"]
+        lines.append(
+            f"{stage:<20} {result['lines']:>12,} {result['seconds']:>9.3f} "
+            f"{result['median_seconds']:>9.3f} {result['runs']:>5} "
+            f"{result['import_seconds']:>9.3f} "
+            f"{result['lines_per_second']:>12,.0f} "
+            f"{'n/a' if peak is None else format(peak, ',.1f'):>12}"
+        )
+    return "\n".join(lines)
+
+
+def build_parser():
+    from synthetic_logs import SIZES
+
+    parser = argparse.ArgumentParser(
+        prog="benchmark",
+        description="Measure every processing stage on seeded synthetic logs.",
+    )
+    parser.add_argument("--size", default="10k", choices=list(SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes of the processors"
+    )
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=STAGES,
+        help="only run this stage and the ones it needs (repeatable)",
+    )
+    parser.add_argument(
+        "--folder", help="where the dataset is generated (default: a temporary folder)"
+    )
+    parser.add_argument("--save", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", help="a JSON baseline to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=DEFAULT_REPEATS,
+        help="runs of every stage, the best one is kept",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=DEFAULT_MIN_SECONDS,
+        help="keep running a stage until this much time was measured, "
+        "shorter stages are not compared",
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=IMPORT_BUDGET_SECONDS,
+        help="seconds importing create_summary may take",
+    )
+    parser.add_argument(
+        "--imports-only",
+        action="store_true",
+        help="only check the import budget, without generating logs, exits with 1 when it is exceeded",
+    )
+    return parser
+
+
+# function to run the benchmark from the command line, the exit code is 1 when a regression is found.
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    stages = None
+    if args.stage:
+        # the extraction and analysis stages read the outputs of the processors.
+        needed = set(args.stage)
+        if "extract_ec2_errors" in needed:
+            needed.add("fund_transfer")
+        if "extract_rds_errors" in needed:
+            needed.add("rds")
+        if "ai_insights" in needed:
+            needed.update(["rds", "promotexter"])
+        stages = [stage for stage in STAGES if stage in needed]
+
+    # the import budget is checked on every run, it does not need a baseline.
+    import_seconds, import_problems = check_import_budget(budget=args.import_budget)
+    print(f"import create_summary: {import_seconds:.3f}s")
+    for problem in import_problems:
+        print(f"REGRESSION {problem}")
+    if args.imports_only:
+        return 1 if import_problems else 0
+
+    results = run_benchmark(
+        args.size,
+        args.seed,
+        args.folder,
+        args.workers,
+        stages,
+        args.repeats,
+        args.min_seconds,
+    )
+    print(format_results(results))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved: {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("size") != results["size"]:
+            print(f"Warning: the baseline was measured at size {baseline.get('size')}")
+        regressions = find_regressions(
+            results, baseline, args.tolerance, args.min_seconds
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions or import_problems:
+            return 1
+        print("No regressions.")
+    return 1 if import_problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from compressed_io import is_compressed
+
+# the checkpoints are kept next to the input files, one entry per input file name.
+CHECKPOINT_FILE_NAME = ".codexcope_checkpoints.json"
+
+# only this many bytes of the last processed line are hashed.
+LAST_LINE_HASH_SIZE = 4096
+
+# why pending_range starts where it does.
+NEW_FILE = "new"
+RESUMED = "resumed"
+ROTATED = "rotated"
+TRUNCATED = "truncated"
+
+
+def _checkpoint_path(file_path):
+    return os.path.join(os.path.dirname(file_path), CHECKPOINT_FILE_NAME)
+
+
+def _load_checkpoints(file_path):
+    try:
+        with open(_checkpoint_path(file_path), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_checkpoints(file_path, checkpoints):
+    checkpoint_path = _checkpoint_path(file_path)
+    temporary_path = f"{checkpoint_path}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(checkpoints, f, indent=2)
+    # replace the old checkpoints in one step so a crash never leaves a half written file.
+    os.replace(temporary_path, checkpoint_path)
+
+
+# function to hash the last line that ends at the given byte offset.
+def _last_line_hash(file, offset):
+    file.seek(max(0, offset - LAST_LINE_HASH_SIZE))
+    block = file.read(min(offset, LAST_LINE_HASH_SIZE))
+    last_line = block[block.rfind(b"\n", 0, len(block) - 1) + 1 :]
+    return hashlib.sha256(last_line).hexdigest()
+
+
+# function to find the byte range of an input file that still has to be processed.
+# returns (start, end, reason), the reason is NEW_FILE when there is no checkpoint (or reset is set),
+# RESUMED when the file grew since the checkpoint, ROTATED when it has a new inode and TRUNCATED
+# when it is shorter or its content changed. start is 0 unless the file is resumed.
+# end stops after the last complete line so a line that is still being written is left for the next run.
+# the offsets are byte offsets of the file, so a compressed file cannot be resumed.
+def pending_range(file_path, reset=False):
+    if is_compressed(file_path):
+        raise ValueError(
+            f"Incremental processing needs an uncompressed log file: {file_path}"
+        )
+    checkpoint = None
+    if not reset:
+        checkpoint = _load_checkpoints(file_path).get(os.path.basename(file_path))
+    stat = os.stat(file_path)
+
+    with open(file_path, "rb") as file:
+        start = 0
+        if not checkpoint:
+            reason = NEW_FILE
+        elif checkpoint["inode"] != stat.st_ino:
+            reason = ROTATED
+        elif (
+            checkpoint["offset"] > stat.st_size
+            or _last_line_hash(file, checkpoint["offset"])
+            != checkpoint["last_line_hash"]
+        ):
+            reason = TRUNCATED
+        else:
+            reason = RESUMED
+            start = checkpoint["offset"]
+
+        # look back from the end of the file for the last newline.
+        end = stat.st_size
+        while end > start:
+            block_start = max(start, end - 65536)
+            file.seek(block_start)
+            newline = file.read(end - block_start).rfind(b"\n")
+            if newline != -1:
+                end = block_start + newline + 1
+                break
+            end = block_start
+
+    return start, end, reason
+
+
+# function to pick the mode the outputs of an incremental run are opened with.
+# only a run without a checkpoint starts the outputs over. after a rotation or truncation the new file
+# is read from its start and appended, so the rows already extracted from the old file are kept.
+def output_mode(reason):
+    return "w" if reason == NEW_FILE else "a"
+
+
+# function to save the checkpoint of an input file once it has been processed up to the given byte offset.
+def save_checkpoint(file_path, offset):
+    checkpoints = _load_checkpoints(file_path)
+    with open(file_path, "rb") as file:
+        checkpoints[os.path.basename(file_path)] = {
+            "offset": offset,
+            "inode": os.fstat(file.fileno()).st_ino,
+            "last_line_hash": _last_line_hash(file, offset),
+        }
+    _save_checkpoints(file_path, checkpoints)
+
+
+# function to forget the checkpoint of an input file, used after a full run so the next incremental run starts over.
+def clear_checkpoint(file_path):
+    checkpoints = _load_checkpoints(file_path)
+    if checkpoints.pop(os.path.basename(file_path), None) is not None:
+        _save_checkpoints(file_path, checkpoints)
@@ -0,0 +1,167 @@
+import argparse
+import os
+import sys
+from compressed_io import OUTPUT_EXTENSIONS, is_compressed
+from instrumentation import TRACE_ENV_VAR, TRACE_FORMATS, enable_tracing
+
+
+# function to build the command line parser.
+# every subcommand takes explicit paths, so the pipeline can run from cron or a container without a display.
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="codexcope",
+        description="Process EC2, RDS and Promotexter logs without the GUI.",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=None,
+        help="write the time, lines, bytes and peak memory of every stage to this file "
+        f"(same as setting {TRACE_ENV_VAR})",
+    )
+    parser.add_argument(
+        "--trace-format",
+        choices=TRACE_FORMATS,
+        default=None,
+        help="json or a prometheus textfile (default: prometheus for a .prom path, else json)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in [
+        ("fund-transfer", "process the EC2 fund transfer logs"),
+        ("rds", "process the RDS logs"),
+        ("promotexter", "process the Promotexter logs"),
+    ]:
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument("file_path", help="the log file to process")
+        subparser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="number of worker processes (default: a single core)",
+        )
+        if command != "rds":
+            subparser.add_argument(
+                "--incremental",
+                action="store_true",
+                help="only process the lines added since the last incremental run",
+            )
+            subparser.add_argument(
+                "--reset",
+                action="store_true",
+                help="with --incremental, forget the checkpoint and overwrite the outputs",
+            )
+        if command == "fund-transfer":
+            subparser.add_argument(
+                "--compress-output",
+                choices=list(OUTPUT_EXTENSIONS),
+                default=None,
+                help="compress the raw EC2 and raw 200 OK outputs",
+            )
+
+    summary_parser = subparsers.add_parser("summary", help="create the summary report")
+    summary_parser.add_argument(
+        "base_path", help="the folder containing all the processed log files"
+    )
+    summary_parser.add_argument(
+        "output_dir", help="the folder where the summary report is saved"
+    )
+
+    batch_parser = subparsers.add_parser(
+        "batch-summary",
+        help="create a summary report per day folder and a rollup report",
+    )
+    batch_parser.add_argument(
+        "output_dir", help="the folder where the summary reports are saved"
+    )
+    batch_parser.add_argument(
+        "day_folders",
+        nargs="+",
+        help="the processed day folders, glob patterns such as 'logs/2024-11-*' are expanded",
+    )
+    batch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of days summarized at once (default: one per core)",
+    )
+
+    return parser
+
+
+# function to run the command line tool.
+# the processing modules are imported per subcommand so a call only pays for what it runs.
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.trace:
+        enable_tracing(args.trace, args.trace_format)
+
+    if args.command == "summary":
+        for path in (args.base_path, args.output_dir):
+            if not os.path.isdir(path):
+                parser.error(f"not a directory: {path}")
+
+        from create_summary import write_summary
+
+        summary_file_path = write_summary(args.base_path, args.output_dir)
+        print(f"Overview Report generated: {summary_file_path}")
+        return 0
+
+    if args.command == "batch-summary":
+        if not os.path.isdir(args.output_dir):
+            parser.error(f"not a directory: {args.output_dir}")
+        if args.workers is not None and args.workers < 1:
+            parser.error("--workers must be at least 1")
+
+        from batch_summary import expand_day_folders, write_batch_summary
+
+        if not expand_day_folders(args.day_folders):
+            parser.error("no day folders found")
+        report_paths, rollup_path = write_batch_summary(
+            args.day_folders, args.output_dir, workers=args.workers
+        )
+        for report_path in report_paths:
+            print(f"Overview Report generated: {report_path}")
+        print(f"Rollup Report generated: {rollup_path}")
+        return 0
+
+    if not os.path.isfile(args.file_path):
+        parser.error(f"no such file: {args.file_path}")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if getattr(args, "incremental", False) and is_compressed(args.file_path):
+        parser.error("--incremental needs an uncompressed log file")
+    if getattr(args, "reset", False) and not args.incremental:
+        parser.error("--reset needs --incremental")
+
+    if args.command == "fund-transfer":
+        from process_fund_transfer_logs import process_fund_transfer_logs
+
+        process_fund_transfer_logs(
+            args.file_path,
+            workers=args.workers,
+            incremental=args.incremental,
+            compress_output=args.compress_output,
+            reset=args.reset,
+        )
+    elif args.command == "rds":
+        from process_rds_logs import process_rds_logs
+
+        process_rds_logs(args.file_path, workers=args.workers)
+    elif args.command == "promotexter":
+        from process_promotexter_logs import process_promotexter_data
+
+        process_promotexter_data(
+            args.file_path,
+            workers=args.workers,
+            incremental=args.incremental,
+            reset=args.reset,
+        )
+
+    print(f"{args.command} execution successful")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import bz2
+import io
+import lzma
+import os
+
+# the compression of a file is told by its extension.
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+# the extension written for every compression that outputs can be saved with.
+OUTPUT_EXTENSIONS = {
+    compression: extension for extension, compression in COMPRESSION_EXTENSIONS.items()
+}
+
+
+# function to tell the compression of a file from its name, None for a plain file.
+def compression_of(file_path):
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+
+def is_compressed(file_path):
+    return compression_of(file_path) is not None
+
+
+# function to remove the compression extension of a file name, "x.csv.gz" becomes "x.csv".
+def strip_compression(file_path):
+    if is_compressed(file_path):
+        return os.path.splitext(file_path)[0]
+    return file_path
+
+
+# function to add the extension of a compression to an output path, the path is unchanged without one.
+def with_compression(file_path, compression=None):
+    if compression is None:
+        return file_path
+    if compression not in OUTPUT_EXTENSIONS:
+        raise ValueError(
+            f"Unknown compression {compression!r}, expected one of {list(OUTPUT_EXTENSIONS)}"
+        )
+    return file_path + OUTPUT_EXTENSIONS[compression]
+
+
+def _open_gzip(file_path, mode):
+    # python-isal is a much faster drop-in for gzip when it is installed.
+    try:
+        from isal import igzip as gzip_module
+    except ImportError:
+        import gzip as gzip_module
+    return gzip_module.open(file_path, mode)
+
+
+def _open_zstd(file_path, mode):
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Reading or writing .zst files needs the zstandard package (pip install zstandard)"
+        )
+    return zstandard.open(file_path, mode)
+
+
+# function to open a file in binary mode, decompressing or compressing it as a stream when its name says so.
+def open_binary(file_path, mode="rb"):
+    compression = compression_of(file_path)
+    if compression is None:
+        return open(file_path, mode)
+    if compression == "gzip":
+        return _open_gzip(file_path, mode)
+    if compression == "bz2":
+        return bz2.open(file_path, mode)
+    if compression == "xz":
+        return lzma.open(file_path, mode)
+    return _open_zstd(file_path, mode)
+
+
+# function to open a file in text mode, decompressing or compressing it as a stream when its name says so.
+# plain files are opened exactly as before, compressed ones are always utf-8.
+def open_text(file_path, mode="r", newline=None, errors=None):
+    if not is_compressed(file_path):
+        return open(file_path, mode, newline=newline, errors=errors)
+    binary = open_binary(file_path, mode.replace("t", "") + "b")
+    return io.TextIOWrapper(binary, encoding="utf-8", errors=errors, newline=newline)
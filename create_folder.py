@@ -8,4 +8,4 @@ def create_folder(based_path, folder_name):
     # check if folder exists, if not create a directory folder.
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)
-        return folder_path
+    return folder_path
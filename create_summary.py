@@ -1,26 +1,86 @@
 import random
 import os
 from datetime import date, datetime
-from tkinter import filedialog, messagebox
 from extract_ec2_errors import extract_ec2_errors
-from extract_rds_errors import extract_rds_errors
+from error_rules import RDS_ERROR_CATEGORIES
+from instrumentation import traced
+from extract_rds_errors import iter_rds_errors
 from analyze_with_ai import analyze_with_ai
+from async_ingest import DEFAULT_CONCURRENCY, map_files
+from reconcile import reconcile
+from record_store import csv_files, load_record_store
+from result_cache import ResultCache
+from template_miner import TemplateMiner, find_sample_id, mine_message_templates
 
+# the version of the cached error summaries, raised whenever the mined templates change
+# so the folders that did not change are summarized again instead of served old templates.
+TEMPLATE_CACHE_VERSION = 3
 
-# function to create the summary
-def create_summary():
+
+# function to extract the ec2 errors of a file and mine them into templates.
+@traced(
+    "summary.ec2_errors", path_argument=0, count_lines=lambda result: result["count"]
+)
+def summarize_ec2_errors(file_path):
+    error_codes = extract_ec2_errors(file_path)
+    return {"count": len(error_codes), "templates": mine_message_templates(error_codes)}
+
+
+# function to stream the rds errors of a file and mine their messages into templates.
+# the sample id of a row is its transaction id, or its first cell.
+@traced(
+    "summary.rds_errors", path_argument=0, count_lines=lambda result: result["count"]
+)
+def summarize_rds_errors(file_path):
+    error_count = 0
+    error_cats = {category: 0 for category in RDS_ERROR_CATEGORIES}
+    miner = TemplateMiner()
+    for row, message, category in iter_rds_errors(file_path):
+        error_count += 1
+        if category:
+            error_cats[category] += 1
+        # only the message is mined, the other columns (such as the customer name) stay out of the report.
+        miner.add(message, find_sample_id(message) or (row[0] if row else None))
+    return {
+        "count": error_count,
+        "categories": error_cats,
+        "templates": miner.summary(),
+    }
+
+
+# function to add one line per error template, with its count and a few sample ids.
+def append_error_templates(summary, templates):
+    for template, count, samples in templates:
+        summary.append(f" - [{count}x] {template} (e.g. {', '.join(samples)})")
+
+
+# function to add a count of missing transactions and the first few of their ids to the summary.
+def append_missing_transactions(summary, label, txn_ids, limit=10):
+    summary.append(f"{label}: {len(txn_ids)}")
+    if txn_ids:
+        shown = ", ".join(txn_ids[:limit])
+        more = f" and {len(txn_ids) - limit} more" if len(txn_ids) > limit else ""
+        summary.append(f" - {shown}{more}")
+
+
+# function to build the lines of the summary report for the base folder containing all the log files.
+# line counts and extracted errors are served from the result cache when the files did not change.
+# the folders are scanned once into a record store that also feeds the AI analysis.
+# up to concurrency files are read at once, the report still follows the listing order of every folder.
+def build_summary(base_path, cache=None, concurrency=DEFAULT_CONCURRENCY):
+    return build_summary_with_totals(base_path, cache, concurrency)[0]
+
+
+# function to build the lines of the summary report together with the totals shown in its overview.
+# the totals are plain numbers, so the totals of several days can be added into a rollup without parsing again.
+def build_summary_with_totals(base_path, cache=None, concurrency=DEFAULT_CONCURRENCY):
+    if cache is None:
+        cache = ResultCache()
+    store = load_record_store(base_path, cache, concurrency)
     date_today = date.today().strftime("%Y-%m-%d")
     current_time = datetime.now().strftime("%H:%M:%S")
     summary = []
 
-    # ask the user to select the base folder containing all the log files.
-    base_path = filedialog.askdirectory(
-        title="Select the folder containing all log files."
-    )
-    if not base_path:
-        messagebox.showerror("Error: ", "No folder selected, Operation is cancelled.")
-        return
-
     summary.append(f"**Summary Report as of {date_today} at {current_time}**")
 
     #  random messages
@@ -57,105 +117,105 @@ def create_summary():
     successful_count = 0
     promotexter_failed_count = 0
     failed_transactions = 0
+    line_count = 0
     error_categories = {
         "NO RECORDS ON FILE": 0,
         "EXCEEDS ACCOUNT AMOUNT LIMIT": 0,
         "SYSTEM FAILURE; CATCH ALL TRANSACTION PROCESSING ERROR CODE": 0,
     }
-    duplicate_transactions = set()
+    # join the sent SMS, the successful rds transactions and the promotexter records on their ids.
+    reconciliation = reconcile(store)
+    duplicate_transactions = reconciliation.duplicate_transactions()
 
     # process ec2 logs.
-    ec2_path = os.path.join(base_path, "Ec2 Logs (Raw)")
-    if os.path.exists(ec2_path):
-        for filename in os.listdir(ec2_path):
-            if filename.endswith(".csv"):
-                file_path = os.path.join(ec2_path, filename)
-                with open(file_path, "r") as f:
-                    line_count = sum(1 for _ in f)
-                # summary.append(
-                #     f"Ec2 Logs (Raw) - {filename}: {line_count} transaction(s)"
-                # )
+    for log_file in store.ec2_raw:
+        line_count = log_file.line_count
+        # summary.append(
+        #     f"Ec2 Logs (Raw) - {log_file.name}: {line_count} transaction(s)"
+        # )
     # Define the base path
     failed_transactions_path = os.path.join(base_path, "Ec2 Failed Transactions")
 
     # Check if the directory exists
     if os.path.exists(failed_transactions_path):
-        # Iterate over the files in the directory
-        for filename in os.listdir(failed_transactions_path):
-            if filename.endswith(".csv"):
-                # Create the full file path
-                file_path = os.path.join(failed_transactions_path, filename)
+        # Use the error extraction function on every file of the directory, several files are read at once.
+        # repeated errors are grouped into templates.
+        failed_files = csv_files(failed_transactions_path)
+        all_ec2_errors = map_files(
+            lambda file_path: cache.get_or_compute(
+                file_path,
+                f"ec2_error_templates.v{TEMPLATE_CACHE_VERSION}",
+                summarize_ec2_errors,
+            ),
+            [file_path for _, file_path in failed_files],
+            concurrency,
+        )
 
-                # Use the error extraction function
-                error_codes = extract_ec2_errors(file_path)
-                promotexter_failed_count = len(error_codes)
+        # Iterate over the files in the directory, in listing order.
+        for (filename, _), ec2_errors in zip(failed_files, all_ec2_errors):
+            promotexter_failed_count = ec2_errors["count"]
 
-                # Append the summary
+            # Append the summary
+            summary.append(
+                f"\nFailed to send SMS - {filename}: {promotexter_failed_count} failed to send SMS transaction(s)"
+            )
+            if ec2_errors["templates"]:
+                summary.append("\nDetailed Errors:")
+                append_error_templates(summary, ec2_errors["templates"])
+            else:
                 summary.append(
-                    f"\nFailed to send SMS - {filename}: {promotexter_failed_count} failed to send SMS transaction(s)"
+                    "Congratulations, no specific errors found in the log file."
                 )
-                if error_codes:
-                    summary.append("\nDetailed Errors:")
-                    for error in error_codes:
-                        summary.append(f" - {error}")
-                else:
-                    summary.append(
-                        "Congratulations, no specific errors found in the log file."
-                    )
     # process the RDS logs.
     rds_path = os.path.join(base_path, "RDS Records")
-    if os.path.exists(rds_path):
-        for filename in os.listdir(rds_path):
-            if filename.endswith(".csv"):
-                file_path = os.path.join(rds_path, filename)
-                with open(file_path, "r") as f:
-                    successful_count = sum(1 for _ in f)
-                summary.append(
-                    f"\nUnionBank Successful Transactions - {filename}: {successful_count} successful transaction(s)"
-                )
+    for log_file in store.rds:
+        successful_count = log_file.line_count
+        summary.append(
+            f"\nUnionBank Successful Transactions - {log_file.name}: {successful_count} successful transaction(s)"
+        )
 
     # process the promotexter logs.
-    promotexter_path = os.path.join(base_path, "Promotexter Records")
-    if os.path.exists(promotexter_path):
-        for filename in os.listdir(promotexter_path):
-            if filename.endswith(".csv"):
-                file_path = os.path.join(promotexter_path, filename)
-                with open(file_path, "r") as f:
-                    line_count = sum(1 for _ in f)
-                summary.append(
-                    f"Sent SMS from Promotexter - {filename}: {line_count} transaction(s) sent succesfully."
-                )
+    for log_file in store.promotexter:
+        line_count = log_file.line_count
+        summary.append(
+            f"Sent SMS from Promotexter - {log_file.name}: {line_count} transaction(s) sent succesfully."
+        )
 
     # Define the path for RDS failed transactions
     failed_rds_transactions_path = os.path.join(rds_path, "RDS Failed Transactions")
 
     # Check if the directory exists
     if os.path.exists(failed_rds_transactions_path):
-        # Iterate over the files in the directory
-        for filename in os.listdir(failed_rds_transactions_path):
-            if filename.endswith(".csv"):
-                # Create the full path for the file
-                file_path = os.path.join(failed_rds_transactions_path, filename)
-
-                # Extract error codes and categories
-                error_codes, error_cats = extract_rds_errors(file_path)
-                failed_transactions = len(error_codes)
-
-                # Update the error categories dynamically (increment counts)
-                for category, count in error_cats.items():
-                    if category in error_categories:
-                        error_categories[category] += count
-                    else:
-                        error_categories[category] = count
-
-                # Append transaction details to the summary
-                summary.append(
-                    f"\nRDS Failed Transaction(s) - {filename}: {failed_transactions} transaction(s)"
-                )
-                if error_codes:
-                    summary.append("Found Errors:")
-                    for error in error_codes:
-                        summary.append(f" - {error}")
+        # Extract error codes and categories of every file of the directory, several files are read at once.
+        failed_files = csv_files(failed_rds_transactions_path)
+        all_rds_errors = map_files(
+            lambda file_path: cache.get_or_compute(
+                file_path,
+                f"rds_error_summary.v{TEMPLATE_CACHE_VERSION}",
+                summarize_rds_errors,
+            ),
+            [file_path for _, file_path in failed_files],
+            concurrency,
+        )
+
+        # Iterate over the files in the directory, in listing order.
+        for (filename, _), rds_errors in zip(failed_files, all_rds_errors):
+            failed_transactions = rds_errors["count"]
+
+            # Update the error categories dynamically (increment counts)
+            for category, count in rds_errors["categories"].items():
+                if category in error_categories:
+                    error_categories[category] += count
+                else:
+                    error_categories[category] = count
+
+            # Append transaction details to the summary
+            summary.append(
+                f"\nRDS Failed Transaction(s) - {filename}: {failed_transactions} transaction(s)"
+            )
+            if rds_errors["templates"]:
+                summary.append("Found Errors:")
+                append_error_templates(summary, rds_errors["templates"])
     else:
         summary.append("No RDS Failed Transactions directory found.")
 
@@ -182,8 +242,27 @@ def create_summary():
             summary.append(
                 f"DUPLICATE TRANSACTION  - source_txn_id: {txn_id}, Name: {name}"
             )
-        # add the analysis of AI.
-    ai_insights = analyze_with_ai(base_path)
+
+    # add the transactions that are missing from one of the sources.
+    if reconciliation.sms.rows:
+        summary.append("\nReconciliation:")
+        append_missing_transactions(
+            summary,
+            "SMS sent without a successful RDS transaction",
+            reconciliation.sms_without_rds,
+        )
+        append_missing_transactions(
+            summary,
+            "Successful RDS transactions without an SMS",
+            reconciliation.rds_without_sms,
+        )
+    if reconciliation.promotexter.duplicates:
+        summary.append(
+            f"Duplicate Promotexter records: {len(reconciliation.promotexter.duplicates)}"
+        )
+
+    # add the analysis of AI.
+    ai_insights = analyze_with_ai(base_path, store)
 
     # add AI insights to the summary
     summary.append("\n --------------------AI Insights---------------------------\n")
@@ -223,6 +302,53 @@ def create_summary():
     for rec in ai_insights["overall_recommendations"]:
         summary.append(f" - {rec}")
 
+    totals = {
+        "successful_transactions": successful_count,
+        "failed_transactions": failed_transactions,
+        "sms_sent": line_count,
+        "sms_failed": promotexter_failed_count,
+        "error_categories": dict(error_categories),
+        "duplicate_transactions": len(duplicate_transactions),
+        "sms_without_rds": len(reconciliation.sms_without_rds),
+        "rds_without_sms": len(reconciliation.rds_without_sms),
+    }
+    return summary, totals
+
+
+# function to save the lines of a summary report into the documentation folder, named after the report date.
+# returns the path of the report, the report date is today unless given.
+def save_summary(summary, documentation_folder, report_date=None):
+    if report_date is None:
+        report_date = date.today().strftime("%Y-%m-%d")
+
+    # write summary to file.
+    summary_file_path = os.path.join(
+        documentation_folder, f"Data_Evaluation_for_{report_date}.txt"
+    )
+    with open(summary_file_path, "w") as f:
+        f.write("\n".join(summary))
+    return summary_file_path
+
+
+# function to write the summary report into the documentation folder.
+# returns the path of the report, this does not need the GUI so it can be called from the command line.
+def write_summary(base_path, documentation_folder):
+    return save_summary(build_summary(base_path), documentation_folder)
+
+
+# function to create the summary
+def create_summary():
+    # tkinter is only imported here so the summary can be built without a display.
+    from tkinter import filedialog, messagebox
+
+    # ask the user to select the base folder containing all the log files.
+    base_path = filedialog.askdirectory(
+        title="Select the folder containing all log files."
+    )
+    if not base_path:
+        messagebox.showerror("Error: ", "No folder selected, Operation is cancelled.")
+        return
+
     # ask user to select where to save the documentation
     documentation_folder = filedialog.askdirectory(
         title="Please select where to save the documentation"
@@ -235,11 +361,5 @@ def create_summary():
         )
         return
 
-    # write summary to file.
-    summary_file_path = os.path.join(
-        documentation_folder, f"Data_Evaluation_for_{date_today}.txt"
-    )
-    with open(summary_file_path, "w") as f:
-        f.write("\n".join(summary))
-
+    summary_file_path = write_summary(base_path, documentation_folder)
     messagebox.showinfo("Success!", f"Overview Report generated: {summary_file_path}")
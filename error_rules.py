@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from keyword_matcher import KeywordMatcher
+
+# the error categorization rules, in priority order: (keyword, analyzer category, rds category).
+# keywords are matched case-insensitively, a rule without a rds category is not counted by extract_rds_errors.
+ERROR_RULES = [
+    ("NO RECORD ON FILE", "INVALID_ACCOUNT", "NO RECORDS ON FILE"),
+    (
+        "EXCEEDS ACCOUNT AMOUNT LIMIT",
+        "LIMIT_EXCEEDED",
+        "EXCEEDS ACCOUNT AMOUNT LIMIT",
+    ),
+    (
+        "SYSTEM FAILURE; CATCH ALL TRANSACTION PROCESSING ERROR CODE",
+        "SYSTEM_ERROR",
+        "SYSTEM FAILURE; CATCH ALL TRANSACTION PROCESSING ERROR CODE",
+    ),
+    ("SYSTEM FAILURE", "SYSTEM_ERROR", None),
+]
+
+# the rds categories, in the order they are reported.
+RDS_ERROR_CATEGORIES = list(
+    dict.fromkeys(rds_category for _, _, rds_category in ERROR_RULES if rds_category)
+)
+
+# every rule is compiled into one matcher, the category of a keyword is its rule index.
+ERROR_RULE_MATCHER = KeywordMatcher(
+    {index: [keyword] for index, (keyword, _, _) in enumerate(ERROR_RULES)},
+    ignore_case=True,
+)
+
+# the digit runs of a message, masked before the cache lookup.
+# no rule keyword contains a digit, so masking them never changes which rules match.
+VARIABLE_PATTERN = re.compile(r"\d+")
+if any(character.isdigit() for keyword, _, _ in ERROR_RULES for character in keyword):
+    raise ValueError("Error rule keywords must not contain digits, they are masked")
+
+# how many distinct normalized messages are remembered, failure logs repeat a few hundred templates.
+CATEGORY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _categorize_normalized(message: str) -> Tuple[Optional[str], Optional[str]]:
+    analyzer_category = None
+    rds_category = None
+    for index in sorted(ERROR_RULE_MATCHER.categories(message)):
+        _, rule_analyzer_category, rule_rds_category = ERROR_RULES[index]
+        if analyzer_category is None:
+            analyzer_category = rule_analyzer_category
+        if rds_category is None and rule_rds_category:
+            rds_category = rule_rds_category
+    return analyzer_category, rds_category
+
+
+def categorize_message(message: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return the (analyzer category, rds category) of an error message, None when no rule matches."""
+    # ids, amounts and timestamps are masked so the lines of one template share a cache entry.
+    return _categorize_normalized(VARIABLE_PATTERN.sub("0", message.strip().upper()))
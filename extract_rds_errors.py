@@ -1,24 +1,19 @@
 import csv
+from compressed_io import open_text
+from instrumentation import traced
+from error_rules import RDS_ERROR_CATEGORIES, categorize_message
 
 
-# function to extract the errors from the rds records, this is done to do some cross checking from the ec2 records.
-def extract_rds_errors(file_path):
-    rds_error_messages = []
-    rds_error_categories = {
-        "NO RECORDS ON FILE": 0,
-        "EXCEEDS ACCOUNT AMOUNT LIMIT": 0,
-        "SYSTEM FAILURE; CATCH ALL TRANSACTION PROCESSING ERROR CODE": 0,
-    }
-
+# function to stream the failed rows of the rds records, this is done to do some cross checking from the ec2 records.
+# the message column is found from the header, then yields (row, message, category) for every row after the header,
+# the category is None when the message matches no rds category.
+def iter_rds_errors(file_path):
     try:
-        with open(file_path, "r", newline="") as file:
+        with open_text(file_path, newline="") as file:
             reader = csv.reader(file)
-            read_all_rows = list(reader)  # read all rows including the headers.
-
-            if not read_all_rows:
-                return rds_error_messages, rds_error_categories
-
-            headers = read_all_rows[0]
+            headers = next(reader, None)
+            if headers is None:
+                return
 
             # find the message column index.
             message_col_index = None
@@ -29,29 +24,34 @@ def extract_rds_errors(file_path):
 
             if message_col_index is None:
                 print("Warning: No message column found in CSV headers")
-                return rds_error_messages, rds_error_categories
+                return
 
-            # process each row including the header
-            for row in read_all_rows:
+            # process each row after the header, one at a time.
+            for row in reader:
                 if len(row) > message_col_index:
-                    message = row[message_col_index]
-
                     # Categorize errors based on message content
-                    if "NO RECORD ON FILE" in message.upper():
-                        rds_error_categories["NO RECORDS ON FILE"] += 1
-                    elif "EXCEEDS ACCOUNT AMOUNT LIMIT" in message.upper():
-                        rds_error_categories["EXCEEDS ACCOUNT AMOUNT LIMIT"] += 1
-                    elif (
-                        "SYSTEM FAILURE; CATCH ALL TRANSACTION PROCESSING ERROR CODE"
-                        in message.upper()
-                    ):
-                        rds_error_categories[
-                            "SYSTEM FAILURE; CATCH ALL TRANSACTION PROCESSING ERROR CODE"
-                        ] += 1
-
-                    rds_error_messages.append(", ".join(row))
+                    message = row[message_col_index]
+                    _, category = categorize_message(message)
+                    yield row, message, category
 
     except Exception as e:
         print(f"Error processing RDS errors: {str(e)}")
 
-    return rds_error_messages, rds_error_categories
+
+# function to extract the errors from the rds records.
+# returns the number of failed rows, the count of every error category and at most sample_size of the messages,
+# so the memory stays flat no matter how many rows the export has.
+@traced("extract_rds_errors", path_argument=0, count_lines=lambda result: result[0])
+def extract_rds_errors(file_path, sample_size=0):
+    rds_error_count = 0
+    rds_error_categories = {category: 0 for category in RDS_ERROR_CATEGORIES}
+    rds_error_samples = []
+
+    for row, _, category in iter_rds_errors(file_path):
+        rds_error_count += 1
+        if category:
+            rds_error_categories[category] += 1
+        if len(rds_error_samples) < sample_size:
+            rds_error_samples.append(", ".join(row))
+
+    return rds_error_count, rds_error_categories, rds_error_samples
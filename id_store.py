@@ -0,0 +1,161 @@
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# how many ids are encoded at a time while a store is built.
+BUILD_CHUNK_SIZE = 1 << 20
+
+# the FNV-1a 64 bit constants, used to hash every id of an array at once.
+FNV_OFFSET_BASIS = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+
+
+def _hash_ids(ids):
+    """Return the FNV-1a hash of every fixed-width id of a bytes array, one column of bytes at a time."""
+    width = ids.dtype.itemsize
+    columns = np.frombuffer(ids.tobytes(), dtype=np.uint8).reshape(len(ids), width)
+    hashes = np.full(len(ids), FNV_OFFSET_BASIS, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for column in range(width):
+            byte = columns[:, column]
+            # the zero padding of the shorter ids is skipped, so an id hashes the same at any width.
+            padded = byte == 0
+            hashed = (hashes ^ byte.astype(np.uint64)) * FNV_PRIME
+            hashes = np.where(padded, hashes, hashed)
+    return hashes
+
+
+class BloomFilter:
+    """Bit array that answers "maybe present" or "surely absent" for ids.
+
+    The k bit positions of an id come from one 64 bit hash by double hashing,
+    so a whole array of ids is added or checked with a few numpy operations.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, ids):
+        hashes = _hash_ids(ids)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            return (low[:, None] + steps[None, :] * high[:, None]) % np.uint64(
+                self.size
+            )
+
+    def add_many(self, ids) -> None:
+        positions = self._positions(ids).ravel()
+        np.bitwise_or.at(
+            self.bits,
+            (positions >> np.uint64(3)).astype(np.intp),
+            (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)),
+        )
+
+    def might_contain_many(self, ids):
+        positions = self._positions(ids)
+        bytes_ = self.bits[(positions >> np.uint64(3)).astype(np.intp)]
+        return np.all(
+            (bytes_ >> (positions & np.uint64(7)).astype(np.uint8)) & 1, axis=1
+        )
+
+
+class IdStore:
+    """Sorted fixed-width byte ids with their counts, in two numpy arrays.
+
+    Ten million 15 character ids take about 230 MB here, against gigabytes
+    as a set of Python strings. Lookups are binary searches, and the optional
+    Bloom filter answers most lookups of absent ids without one.
+    """
+
+    def __init__(self, ids, counts, bloom: Optional[BloomFilter] = None):
+        self.ids = ids
+        self.counts = counts
+        self.bloom = bloom
+
+    @classmethod
+    def from_ids(
+        cls,
+        ids: Iterable[str],
+        bloom_false_positive_rate: Optional[float] = None,
+        chunk_size: int = BUILD_CHUNK_SIZE,
+    ) -> "IdStore":
+        """Build a store from a stream of ids, encoding them chunk by chunk."""
+        chunks = []
+        pending = []
+        for txn_id in ids:
+            pending.append(txn_id.encode("utf-8"))
+            if len(pending) >= chunk_size:
+                chunks.append(np.array(pending, dtype=np.bytes_))
+                pending = []
+        if pending:
+            chunks.append(np.array(pending, dtype=np.bytes_))
+
+        if chunks:
+            # the chunks are widened to the longest id when they are joined.
+            unique_ids, counts = np.unique(np.concatenate(chunks), return_counts=True)
+        else:
+            unique_ids, counts = np.array([], dtype="S1"), np.array([], dtype=np.int64)
+
+        bloom = None
+        if bloom_false_positive_rate is not None:
+            bloom = BloomFilter(len(unique_ids), bloom_false_positive_rate)
+            if len(unique_ids):
+                bloom.add_many(unique_ids)
+        return cls(unique_ids, counts, bloom)
+
+    @property
+    def rows(self) -> int:
+        """The number of ids added, duplicates included."""
+        return int(self.counts.sum())
+
+    @property
+    def nbytes(self) -> int:
+        size = self.ids.nbytes + self.counts.nbytes
+        if self.bloom is not None:
+            size += self.bloom.bits.nbytes
+        return size
+
+    @property
+    def duplicates(self) -> Dict[str, int]:
+        """Return every id added more than once, with how many times it was added."""
+        repeated = self.counts > 1
+        return {
+            txn_id.decode("utf-8"): int(count)
+            for txn_id, count in zip(self.ids[repeated], self.counts[repeated])
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, txn_id: str) -> bool:
+        return bool(self.contains_many([txn_id])[0])
+
+    def contains_many(self, txn_ids: Iterable[str]):
+        """Return a boolean array telling which of the ids are in the store."""
+        queries = np.array(
+            [txn_id.encode("utf-8") for txn_id in txn_ids], dtype=np.bytes_
+        )
+        found = np.zeros(len(queries), dtype=bool)
+        if not len(queries) or not len(self.ids):
+            return found
+
+        candidates = np.arange(len(queries))
+        if self.bloom is not None:
+            candidates = candidates[self.bloom.might_contain_many(queries)]
+        positions = np.searchsorted(self.ids, queries[candidates])
+        positions = np.minimum(positions, len(self.ids) - 1)
+        found[candidates] = self.ids[positions] == queries[candidates]
+        return found
+
+    def missing_from(self, other: "IdStore") -> List[str]:
+        """Return the ids of this store that the other one does not have, in sorted order."""
+        missing = ~np.isin(self.ids, other.ids, assume_unique=True)
+        return [txn_id.decode("utf-8") for txn_id in self.ids[missing]]
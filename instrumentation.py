@@ -0,0 +1,344 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import parent_process
+
+# the trace is turned on by setting this to the path of the trace file.
+TRACE_ENV_VAR = "CODEXCOPE_TRACE"
+# "json" or "prometheus", by default a .prom file gets the prometheus format and anything else json.
+TRACE_FORMAT_ENV_VAR = "CODEXCOPE_TRACE_FORMAT"
+
+TRACE_FORMATS = ["json", "prometheus"]
+
+
+# function to read the peak resident memory of the current process in MB, None when it cannot be measured.
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # linux reports kilobytes, macOS bytes.
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, "peak_wset", memory.rss) / (1024 * 1024)
+
+
+class StageRecord:
+    """The measurements of one stage, added up over every time the stage ran."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.lines = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.process_peak_rss_mb = None
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "lines": self.lines,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "lines_per_second": self.lines / self.seconds if self.seconds else 0.0,
+            # ru_maxrss only grows, so this is the peak of the whole process up to the stage, not of the stage alone.
+            "process_peak_rss_mb": self.process_peak_rss_mb,
+        }
+
+
+class Tracer:
+    """Collects the stage records of a run and writes them as a trace file.
+
+    While it is disabled a stage costs one attribute check, so the hooks can
+    stay in the processing code.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.trace_format = "json"
+        self.started = None
+        self.records = {}
+        self._lock = threading.Lock()
+
+    def enable(self, path, trace_format=None):
+        if trace_format is None:
+            trace_format = "prometheus" if path.endswith(".prom") else "json"
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(
+                f"Unknown trace format {trace_format!r}, expected one of {TRACE_FORMATS}"
+            )
+        self.enabled = True
+        self.path = path
+        self.trace_format = trace_format
+        self.started = datetime.now()
+        self.records = {}
+
+    def add(self, name, seconds=0.0, lines=0, bytes_read=0, bytes_written=0, calls=1):
+        """Add measurements to a stage, safe to call from several threads."""
+        with self._lock:
+            record = self.records.get(name)
+            if record is None:
+                record = self.records[name] = StageRecord(name)
+            record.calls += calls
+            record.seconds += seconds
+            record.lines += lines
+            record.bytes_read += bytes_read
+            record.bytes_written += bytes_written
+            # the timed writers add many small parts of a run, the memory is read once per run.
+            if calls:
+                record.process_peak_rss_mb = peak_rss_mb()
+
+    def write(self):
+        """Write the trace file, replacing it in one step so a collector never reads half a file."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            records = [record.to_dict() for record in self.records.values()]
+
+        if self.trace_format == "prometheus":
+            text = _prometheus_text(records)
+        else:
+            text = json.dumps(
+                {
+                    "started": self.started.isoformat(timespec="seconds"),
+                    "pid": os.getpid(),
+                    "stages": records,
+                },
+                indent=2,
+            )
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write(text)
+        os.replace(temporary_path, self.path)
+        return self.path
+
+
+# the tracer of the process, every hook reports to it.
+TRACER = Tracer()
+
+
+# function to turn the trace on, the trace file is written when the process exits or when write_trace is called.
+def enable_tracing(path, trace_format=None):
+    if not TRACER.enabled:
+        atexit.register(TRACER.write)
+    TRACER.enable(path, trace_format)
+
+
+def write_trace():
+    return TRACER.write()
+
+
+class _Measurement:
+    """What a stage adds up while it runs, see stage()."""
+
+    __slots__ = ("lines", "bytes_read", "bytes_written")
+
+    def __init__(self):
+        self.lines = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+
+# context manager that times a block as one run of a stage.
+# the block can add its lines and bytes to the yielded measurement.
+@contextmanager
+def stage(name):
+    measurement = _Measurement()
+    if not TRACER.enabled:
+        yield measurement
+        return
+
+    start = time.perf_counter()
+    try:
+        yield measurement
+    finally:
+        TRACER.add(
+            name,
+            time.perf_counter() - start,
+            measurement.lines,
+            measurement.bytes_read,
+            measurement.bytes_written,
+        )
+
+
+# decorator that times every call of a function as one run of a stage.
+# path_argument is the position of a file path argument whose size is counted as read,
+# count_lines turns the result of the function into the number of lines it went through.
+def traced(name, path_argument=None, count_lines=None):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+
+            with stage(name) as measurement:
+                if path_argument is not None and len(args) > path_argument:
+                    measurement.bytes_read += file_size(args[path_argument])
+                result = function(*args, **kwargs)
+                if count_lines is not None:
+                    measurement.lines += count_lines(result)
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+# function to wrap a csv writer (or a BufferedCsvWriter) so the time spent writing rows, and what they take on disk, is added to a stage.
+# the rows and bytes are counted on the writer and added to the stage when it is flushed, so flush it at the end.
+# the writer is returned as it is while tracing is off.
+def timed_writer(writer, name):
+    if not TRACER.enabled:
+        return writer
+    return _TimedWriter(writer, name)
+
+
+class _TimedFile:
+    """The file of a buffered writer, its writes are the large chunks and the only part that is timed."""
+
+    def __init__(self, file, timed_writer):
+        self.file = file
+        self.timed_writer = timed_writer
+
+    def write(self, text):
+        start = time.perf_counter()
+        written = self.file.write(text)
+        self.timed_writer.seconds += time.perf_counter() - start
+        return written
+
+
+class _TimedWriter:
+    def __init__(self, writer, name):
+        self.writer = writer
+        self.name = name
+        self.seconds = 0.0
+        self.lines = 0
+        self.bytes_written = 0
+        # a buffered writer only writes to its file in large chunks, so only those writes are timed.
+        self.buffered = hasattr(writer, "write_field")
+        if self.buffered:
+            writer.file = _TimedFile(writer.file, self)
+
+    def writerow(self, row):
+        if self.buffered:
+            written = self.writer.writerow(row)
+        else:
+            start = time.perf_counter()
+            written = self.writer.writerow(row)
+            self.seconds += time.perf_counter() - start
+        self.lines += 1
+        self.bytes_written += written or 0
+        return written
+
+    # the single column fast path of a BufferedCsvWriter.
+    def write_field(self, value):
+        written = self.writer.write_field(value)
+        self.lines += 1
+        self.bytes_written += written
+        return written
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    # the counts gathered since the last flush are added to the stage in one step.
+    def flush(self):
+        if self.buffered:
+            self.writer.flush()
+        TRACER.add(
+            self.name,
+            self.seconds,
+            lines=self.lines,
+            bytes_written=self.bytes_written,
+            calls=0,
+        )
+        self.seconds = 0.0
+        self.lines = 0
+        self.bytes_written = 0
+
+
+# function to count the lines of a file, or of one byte range of it, as the input lines of a stage.
+# the file is only read while tracing is on, so an untraced run never reads its input twice.
+# call it before the stage starts so the count is not part of the stage's time.
+def count_input_lines(file_path, start=0, end=None):
+    if not TRACER.enabled:
+        return 0
+    from compressed_io import is_compressed, open_binary
+
+    lines = 0
+    last = b"\n"
+    with open_binary(file_path) as file:
+        # a compressed file is always read as a whole.
+        if start and not is_compressed(file_path):
+            file.seek(start)
+        remaining = None if end is None or is_compressed(file_path) else end - start
+        while remaining is None or remaining > 0:
+            size = 1024 * 1024 if remaining is None else min(1024 * 1024, remaining)
+            block = file.read(size)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+            if remaining is not None:
+                remaining -= len(block)
+    # a last line without a newline is still a line.
+    return lines + (last != b"\n")
+
+
+# function to get the size of a file, 0 when it does not exist.
+def file_size(file_path):
+    try:
+        return os.path.getsize(file_path)
+    except (OSError, TypeError):
+        return 0
+
+
+def _prometheus_text(records):
+    metrics = [
+        ("seconds", "Wall time spent in the stage.", "seconds"),
+        ("lines_total", "Lines processed by the stage.", "lines"),
+        ("bytes_read_total", "Bytes read by the stage.", "bytes_read"),
+        ("bytes_written_total", "Bytes written by the stage.", "bytes_written"),
+        ("calls_total", "Times the stage ran.", "calls"),
+        (
+            "process_peak_rss_megabytes",
+            "Peak resident memory of the whole process when the stage ended.",
+            "process_peak_rss_mb",
+        ),
+    ]
+    lines = []
+    for metric, help_text, key in metrics:
+        lines.append(f"# HELP codexcope_stage_{metric} {help_text}")
+        lines.append(f"# TYPE codexcope_stage_{metric} gauge")
+        for record in records:
+            if record[key] is not None:
+                lines.append(
+                    f'codexcope_stage_{metric}{{stage="{record["stage"]}"}} {record[key]}'
+                )
+    return "\n".join(lines) + "\n"
+
+
+# the trace is turned on from the environment in the main process only, the worker processes of a pool
+# inherit the variable but must not overwrite the trace of the run.
+if os.environ.get(TRACE_ENV_VAR) and parent_process() is None:
+    enable_tracing(
+        os.environ[TRACE_ENV_VAR], os.environ.get(TRACE_FORMAT_ENV_VAR) or None
+    )
@@ -0,0 +1,114 @@
+import re
+
+# keywords that mark an ec2 line as an unsuccessful transaction.
+EC2_ERROR_KEYWORDS = [
+    "HTTP Status Code: ",
+    "I/O",
+    "Unexpected error:",
+    "error_message:",
+    "Response Body:",
+]
+
+# keywords that mark a rds row as a successful or failed transaction.
+RDS_SUCCESS_CODES = ["TS"]
+RDS_FAILURE_CODES = ["TF", "SC", "SP", "-20", "RT"]
+
+# keywords that mark any log line as an error for the analyzer (matched case-insensitively).
+ERROR_INDICATORS = [
+    "ERROR",
+    "FAILED",
+    "EXCEPTION",
+    "HTTP Status Code: 4",
+    "HTTP Status Code: 5",
+    "NO RECORD ON FILE",
+    "SYSTEM FAILURE",
+]
+
+
+# function to check if the end of one keyword is the start of another with other categories,
+# a plain scan would then consume the first keyword and miss the categories of the second.
+def _partly_overlap(keyword_categories):
+    for keyword, found in keyword_categories.items():
+        for other, other_categories in keyword_categories.items():
+            if keyword in other or other in keyword or other_categories <= found:
+                continue
+            if any(
+                keyword.endswith(other[:size])
+                for size in range(1, min(len(keyword), len(other)))
+            ):
+                return True
+    return False
+
+
+# class to match many keywords against a line with one precompiled regex.
+# each keyword belongs to one or more categories, and a single scan of the line returns every category that matched.
+class KeywordMatcher:
+    def __init__(self, categories, ignore_case=False):
+        """Compile the keywords of every category into one alternation regex."""
+        self.ignore_case = ignore_case
+        self.keyword_categories = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self.keyword_categories.setdefault(self._normalize(keyword), set()).add(
+                    category
+                )
+
+        # a keyword hidden inside a longer keyword still counts when the longer one matches.
+        for keyword, found in self.keyword_categories.items():
+            for other, other_categories in self.keyword_categories.items():
+                if other != keyword and other in keyword:
+                    found |= other_categories
+        self.keyword_categories = {
+            keyword: frozenset(found)
+            for keyword, found in self.keyword_categories.items()
+        }
+
+        # longest keywords first so the regex prefers them at the same position.
+        alternation = "|".join(
+            re.escape(keyword)
+            for keyword in sorted(self.keyword_categories, key=len, reverse=True)
+        )
+        flags = re.IGNORECASE if ignore_case else 0
+        self.regex = re.compile(alternation, flags)
+        # the keywords inside a longer keyword are already folded into it, so a plain scan finds every category.
+        # only keywords that partly overlap (the end of one is the start of another) need the slower lookahead,
+        # which keeps the matches zero-width and tries the whole alternation at every character.
+        if _partly_overlap(self.keyword_categories):
+            self.all_regex = re.compile(f"(?=({alternation}))", flags)
+        else:
+            self.all_regex = re.compile(f"({alternation})", flags)
+        # the same alternation over raw bytes, used to search files without decoding them.
+        self.bytes_regex = re.compile(alternation.encode("utf-8"), flags)
+
+    def _normalize(self, text):
+        return text.lower() if self.ignore_case else text
+
+    def search(self, text):
+        """Return True if any keyword occurs in the text."""
+        return self.regex.search(text) is not None
+
+    def categories(self, text):
+        """Return the set of every category with a keyword in the text."""
+        found = set()
+        for match in self.all_regex.finditer(text):
+            found |= self.keyword_categories[self._normalize(match.group(1))]
+        return found
+
+    def row_categories(self, row):
+        """Return the categories found in any cell of a csv row."""
+        # the separator never appears in a keyword, so no match can span two cells.
+        return self.categories("\x00".join(row))
+
+
+FUND_TRANSFER_MATCHER = KeywordMatcher(
+    {
+        "raw_ec2": ["sending SMS to"],
+        "status_200_ok": ["SMS sender response code: 200 OK"],
+        "failed_transaction": EC2_ERROR_KEYWORDS,
+    }
+)
+EC2_ERROR_MATCHER = KeywordMatcher({"failed_transaction": EC2_ERROR_KEYWORDS})
+RDS_STATUS_MATCHER = KeywordMatcher(
+    {"successful": RDS_SUCCESS_CODES, "failed": RDS_FAILURE_CODES}
+)
+ERROR_INDICATOR_MATCHER = KeywordMatcher({"error": ERROR_INDICATORS}, ignore_case=True)
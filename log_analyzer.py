@@ -1,15 +1,27 @@
-import numpy as np
 from datetime import datetime, timedelta
 import re
 from collections import Counter, defaultdict
-from sklearn.cluster import DBSCAN
-from sklearn.preprocessing import StandardScaler
-import pandas as pd
 from typing import List, Dict, Tuple
+from error_rules import categorize_message
+from keyword_matcher import ERROR_INDICATOR_MATCHER
+from timestamp_parser import parse_timestamp
 
 
 class LogAnalyzer:
-    def __init__(self):
+    def __init__(
+        self,
+        columnar: bool = False,
+        anomaly_method: str = "dbscan",
+        anomaly_resolution: str = None,
+        anomaly_threshold: float = 3.5,
+    ):
+        # in columnar mode the error and transaction analysis run on numpy columns.
+        self.columnar = columnar
+        # anomalies are found per hour of the day, or over the whole time range when a
+        # resolution ("minute", "5min" or "hour") is set, see anomaly_detection.
+        self.anomaly_method = anomaly_method
+        self.anomaly_resolution = anomaly_resolution
+        self.anomaly_threshold = anomaly_threshold
         self.error_patterns = defaultdict(int)
         self.transaction_times = []
         self.transaction_volumes = defaultdict(int)
@@ -17,10 +29,7 @@ class LogAnalyzer:
 
     def extract_timestamp(self, log_line: str) -> datetime:
         """Extract timestamp from log line."""
-        timestamp_match = re.search(r"\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}", log_line)
-        if timestamp_match:
-            return datetime.strptime(timestamp_match.group(), "%Y-%m-%d %H:%M:%S")
-        return None
+        return parse_timestamp(log_line)
 
     def analyze_error_patterns(self, errors: List[str]) -> Dict:
         """Analyze error patterns and identify common causes."""
@@ -71,10 +80,11 @@ class LogAnalyzer:
         hourly_volumes = self._analyze_hourly_volumes(timestamps)
         analysis["peak_hours"] = self._identify_peak_hours(hourly_volumes)
 
-        # Detect anomalies using DBSCAN
-        if hourly_volumes:
-            anomalies = self._detect_anomalies(list(hourly_volumes.values()))
-            analysis["anomalies"] = anomalies
+        # Detect anomalies
+        if self.anomaly_resolution:
+            analysis["anomalies"] = self._detect_timeline_anomalies(timestamps)
+        elif hourly_volumes:
+            analysis["anomalies"] = self._detect_anomalies(hourly_volumes)
 
         # Generate transaction-specific recommendations
         analysis["recommendations"] = self._generate_transaction_recommendations(
@@ -136,6 +146,8 @@ class LogAnalyzer:
         if not latencies:
             return {"average": 0, "median": 0, "p95": 0}
 
+        import numpy as np
+
         return {
             "average": np.mean(latencies),
             "median": np.median(latencies),
@@ -193,12 +205,9 @@ class LogAnalyzer:
 
     def _categorize_error(self, error: str) -> str:
         """Categorize error messages into common patterns."""
-        if "NO RECORD ON FILE" in error.upper():
-            return "INVALID_ACCOUNT"
-        elif "EXCEEDS ACCOUNT AMOUNT LIMIT" in error.upper():
-            return "LIMIT_EXCEEDED"
-        elif "SYSTEM FAILURE" in error.upper():
-            return "SYSTEM_ERROR"
+        category, _ = categorize_message(error)
+        if category:
+            return category
         elif "HTTP Status Code: " in error:
             return f"HTTP_ERROR_{error.split('HTTP Status Code: ')[1].split()[0]}"
         return "OTHER"
@@ -209,24 +218,47 @@ class LogAnalyzer:
         peak_hours = sorted(hour_counts.items(), key=lambda x: x[1], reverse=True)[:3]
         return [{"hour": hour, "count": count} for hour, count in peak_hours]
 
-    def _detect_anomalies(self, volumes: List[int]) -> List[Dict]:
-        """Detect anomalous transaction patterns using DBSCAN."""
-        if len(volumes) < 2:
-            return []
-
-        X = np.array(volumes).reshape(-1, 1)
-        X_scaled = StandardScaler().fit_transform(X)
+    def _detect_anomalies(self, hourly_volumes: Dict[int, int]) -> List[Dict]:
+        """Detect anomalous hourly transaction volumes."""
+        from anomaly_detection import score_volumes
 
-        clustering = DBSCAN(eps=0.5, min_samples=2).fit(X_scaled)
-        anomalies = []
+        hours = list(hourly_volumes)
+        volumes = list(hourly_volumes.values())
+        anomalies = [
+            {"hour": hours[i], "volume": volumes[i], "deviation": deviation}
+            for i, deviation in score_volumes(
+                volumes, self.anomaly_method, self.anomaly_threshold
+            )
+        ]
+        return sorted(anomalies, key=lambda x: x["deviation"], reverse=True)
 
-        for i, label in enumerate(clustering.labels_):
-            if label == -1:  # Anomaly detected
-                anomalies.append(
-                    {"hour": i, "volume": volumes[i], "deviation": abs(X_scaled[i][0])}
-                )
+    def _detect_timeline_anomalies(self, timestamps) -> List[Dict]:
+        """Detect anomalous volumes over the whole time range at the anomaly resolution."""
+        from anomaly_detection import detect_volume_anomalies
 
-        return sorted(anomalies, key=lambda x: x["deviation"], reverse=True)
+        anomalies = detect_volume_anomalies(
+            timestamps,
+            self.anomaly_resolution,
+            self.anomaly_method,
+            self.anomaly_threshold,
+        )
+        for anomaly in anomalies:
+            anomaly["hour"] = anomaly["timestamp"].hour
+        return anomalies
+
+    def _detect_bucket_anomalies(self, bucket_counts: Dict[int, int]) -> List[Dict]:
+        """Detect anomalous volumes counted per bucket at the anomaly resolution."""
+        from anomaly_detection import detect_bucket_anomalies
+
+        anomalies = detect_bucket_anomalies(
+            bucket_counts,
+            self.anomaly_resolution,
+            self.anomaly_method,
+            self.anomaly_threshold,
+        )
+        for anomaly in anomalies:
+            anomaly["hour"] = anomaly["timestamp"].hour
+        return anomalies
 
     def _calculate_sms_latencies(self, sms_logs: List[str]) -> List[float]:
         """Calculate SMS delivery latencies."""
@@ -244,14 +276,22 @@ class LogAnalyzer:
         self, springboot_logs: List[str], database_logs: List[str], sms_logs: List[str]
     ) -> Dict:
         """Generate comprehensive AI insights from all log sources."""
-        insights = {
-            "error_analysis": self.analyze_error_patterns(
+        if self.columnar:
+            error_analysis, transaction_analysis = self._analyze_columns(
+                springboot_logs, database_logs
+            )
+        else:
+            error_analysis = self.analyze_error_patterns(
                 [log for log in springboot_logs + database_logs if self._is_error(log)]
-            ),
-            "transaction_analysis": self.analyze_transaction_patterns(
+            )
+            transaction_analysis = self.analyze_transaction_patterns(
                 [log for log in database_logs if "TS" in log],
                 [log for log in database_logs if "TF" in log],
-            ),
+            )
+
+        insights = {
+            "error_analysis": error_analysis,
+            "transaction_analysis": transaction_analysis,
             "sms_analysis": self.analyze_sms_delivery(sms_logs),
             "overall_recommendations": [],
         }
@@ -263,17 +303,58 @@ class LogAnalyzer:
 
         return insights
 
+    def _analyze_columns(
+        self, springboot_logs: List[str], database_logs: List[str]
+    ) -> Tuple[Dict, Dict]:
+        """Analyze error and transaction patterns with vectorized column operations."""
+        from log_columns import LogColumns
+
+        vocabulary = {}
+        springboot_columns = LogColumns.from_lines(springboot_logs, self, vocabulary)
+        database_columns = LogColumns.from_lines(database_logs, self, vocabulary)
+
+        # Analyze error frequencies
+        common_patterns = LogColumns.category_counts(
+            [springboot_columns, database_columns]
+        )
+        error_analysis = {
+            "common_patterns": common_patterns,
+            "time_based_patterns": (
+                self._analyze_peak_times() if self.transaction_times else []
+            ),
+            "recommendations": self._generate_recommendations(
+                Counter(dict(common_patterns))
+            ),
+        }
+
+        # Analyze hourly volumes and detect anomalies
+        transaction_analysis = {
+            "success_rate": database_columns.success_rate(),
+            "peak_hours": [],
+            "anomalies": [],
+            "recommendations": [],
+        }
+        hourly_volumes = database_columns.hourly_volumes()
+        transaction_analysis["peak_hours"] = self._identify_peak_hours(hourly_volumes)
+        if self.anomaly_resolution:
+            transaction_analysis["anomalies"] = self._detect_timeline_anomalies(
+                database_columns.transaction_timestamps()
+            )
+        elif hourly_volumes:
+            transaction_analysis["anomalies"] = self._detect_anomalies(hourly_volumes)
+        transaction_analysis["recommendations"] = (
+            self._generate_transaction_recommendations(
+                transaction_analysis["success_rate"],
+                transaction_analysis["peak_hours"],
+                transaction_analysis["anomalies"],
+            )
+        )
+
+        return error_analysis, transaction_analysis
+
     def _is_error(self, log: str) -> bool:
         """Check if a log line represents an error."""
-        error_indicators = [
-            "ERROR",
-            "FAILED",
-            "EXCEPTION",
-            "HTTP Status Code: [45]",
-            "NO RECORD ON FILE",
-            "SYSTEM FAILURE",
-        ]
-        return any(indicator in log.upper() for indicator in error_indicators)
+        return ERROR_INDICATOR_MATCHER.search(log)
 
     def _generate_recommendations(self, error_types: Counter) -> List[str]:
         """Generate recommendations based on error patterns."""
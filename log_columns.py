@@ -0,0 +1,184 @@
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from keyword_matcher import ERROR_INDICATOR_MATCHER
+from timestamp_parser import (
+    TIMESTAMP_LENGTH,
+    find_timestamp_positions,
+    parse_timestamp_codes,
+)
+
+# bit flags of the status column, a line can be both when it contains both codes.
+STATUS_SUCCESS = 1
+STATUS_FAILED = 2
+# category code of the lines that are not errors.
+NO_CATEGORY = -1
+# joins the lines into one buffer, it never appears in a timestamp or a keyword.
+LINE_SEPARATOR = "\x00"
+
+
+# the error indicators in upper case, a case sensitive scan of the upper cased text is much faster than ignoring case.
+ERROR_INDICATOR_UPPER_REGEX = re.compile(
+    "|".join(
+        re.escape(keyword.upper())
+        for keyword in sorted(
+            ERROR_INDICATOR_MATCHER.keyword_categories, key=len, reverse=True
+        )
+    )
+)
+
+
+# function to find the error indicators of a text, the positions of the matches are positions in the text.
+def _find_error_indicators(text: str):
+    upper = text.upper()
+    # a few characters change length in upper case, the positions would then be off.
+    if len(upper) != len(text):
+        return ERROR_INDICATOR_MATCHER.regex.finditer(text)
+    return ERROR_INDICATOR_UPPER_REGEX.finditer(upper)
+
+
+# function to turn a text into an array with one code per character, so array positions are text positions.
+def _character_codes(text: str) -> np.ndarray:
+    if text.isascii():
+        return np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+# function to find every position of a two character code in the character codes of a text.
+def _find_code(codes: np.ndarray, code: str) -> np.ndarray:
+    return np.flatnonzero((codes[:-1] == ord(code[0])) & (codes[1:] == ord(code[1])))
+
+
+class LogColumns:
+    """Log lines loaded into numpy columns: timestamp, status flags and error category code."""
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        status: np.ndarray,
+        category_codes: np.ndarray,
+        categories: List[str],
+    ):
+        self.timestamps = timestamps
+        self.status = status
+        self.category_codes = category_codes
+        self.categories = categories
+
+    @classmethod
+    def from_lines(
+        cls, lines: List[str], analyzer, vocabulary: Dict[str, int] = None
+    ) -> "LogColumns":
+        """Load log lines into columns.
+
+        The lines are joined into one buffer that is scanned once per column,
+        and the matches are mapped back to their lines with numpy. Only the
+        error lines are categorized by the analyzer. Columns that share a
+        vocabulary use the same category codes.
+        """
+        if vocabulary is None:
+            vocabulary = {}
+
+        # the lines are scanned as one buffer, every match is mapped back to its line by its position.
+        # the separator cannot be part of a timestamp or a keyword, so no match spans two lines.
+        joined = LINE_SEPARATOR.join(lines)
+        lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+        line_starts = np.cumsum(lengths + len(LINE_SEPARATOR)) - (
+            lengths + len(LINE_SEPARATOR)
+        )
+
+        def line_of(positions):
+            return np.searchsorted(line_starts, positions, side="right") - 1
+
+        codes = _character_codes(joined)
+
+        # the first timestamp of every line, its digits are taken straight from the character codes.
+        timestamps = np.full(len(lines), np.datetime64("NaT"), dtype="datetime64[s]")
+        positions = find_timestamp_positions(codes)
+        if positions.size:
+            stamp_lines, first = np.unique(line_of(positions), return_index=True)
+            timestamps[stamp_lines] = parse_timestamp_codes(
+                codes[positions[first, None] + np.arange(TIMESTAMP_LENGTH)]
+            )
+
+        status = np.zeros(len(lines), dtype=np.uint8)
+        for code, flag in [("TS", STATUS_SUCCESS), ("TF", STATUS_FAILED)]:
+            positions = _find_code(codes, code)
+            if positions.size:
+                status[line_of(positions)] |= flag
+
+        # only the lines flagged as errors are categorized one by one.
+        category_codes = np.full(len(lines), NO_CATEGORY, dtype=np.int32)
+        error_positions = np.fromiter(
+            (match.start() for match in _find_error_indicators(joined)),
+            dtype=np.int64,
+        )
+        for line in np.unique(line_of(error_positions)).tolist():
+            category = analyzer._categorize_error(lines[line])
+            category_codes[line] = vocabulary.setdefault(category, len(vocabulary))
+
+        categories = [None] * len(vocabulary)
+        for category, code in vocabulary.items():
+            categories[code] = category
+
+        return cls(
+            timestamps,
+            status,
+            category_codes,
+            categories,
+        )
+
+    def _transaction_weights(self) -> np.ndarray:
+        # a line with both codes is counted as a successful and as a failed transaction.
+        return (self.status & STATUS_SUCCESS).astype(np.int64) + (
+            (self.status & STATUS_FAILED) >> 1
+        ).astype(np.int64)
+
+    def success_rate(self) -> float:
+        """Return the percentage of successful transactions."""
+        successful = int(np.count_nonzero(self.status & STATUS_SUCCESS))
+        failed = int(np.count_nonzero(self.status & STATUS_FAILED))
+        total = successful + failed
+        if total == 0:
+            return 0.0
+        return (successful / total) * 100
+
+    def hourly_volumes(self) -> Dict[int, int]:
+        """Return the transaction volume of every hour with traffic, ordered by hour."""
+        weights = self._transaction_weights()
+        has_timestamp = ~np.isnat(self.timestamps) & (weights > 0)
+        if not has_timestamp.any():
+            return {}
+
+        seconds = self.timestamps[has_timestamp].astype(np.int64)
+        hours = (seconds // 3600) % 24
+        volumes = np.bincount(hours, weights=weights[has_timestamp], minlength=24)
+        return {int(hour): int(volumes[hour]) for hour in np.flatnonzero(volumes > 0)}
+
+    def transaction_timestamps(self) -> np.ndarray:
+        """Return the timestamp of every transaction, repeated for lines with both codes."""
+        weights = self._transaction_weights()
+        has_timestamp = ~np.isnat(self.timestamps) & (weights > 0)
+        return np.repeat(self.timestamps[has_timestamp], weights[has_timestamp])
+
+    @staticmethod
+    def category_counts(columns: List["LogColumns"]) -> List[Tuple[str, int]]:
+        """Return the error categories of the columns, most common first.
+
+        Ties keep the order in which the categories first appear, like
+        Counter.most_common. The columns must share a vocabulary.
+        """
+        if not columns:
+            return []
+        codes = np.concatenate([column.category_codes for column in columns])
+        codes = codes[codes != NO_CATEGORY]
+        if codes.size == 0:
+            return []
+
+        unique, first_index, counts = np.unique(
+            codes, return_index=True, return_counts=True
+        )
+        order = np.lexsort((first_index, -counts))
+        categories = columns[-1].categories
+        return [(categories[unique[i]], int(counts[i])) for i in order]
@@ -3,7 +3,6 @@ from tkinter import filedialog, messagebox
 from process_fund_transfer_logs import process_fund_transfer_logs
 from process_promotexter_logs import process_promotexter_data
 from process_rds_logs import process_rds_logs
-from PIL import Image, ImageTk
 from create_summary import create_summary
 
 
@@ -51,6 +50,9 @@ def create_gui():
     create_gradient(canvas, (64, 64, 64), (255, 255, 255), window_width, window_height)
 
     # Add logo (replace 'path_to_logo.png' with your actual logo path)
+    # PIL is only imported when the GUI is built, the processing code never needs it.
+    from PIL import Image, ImageTk
+
     logo = Image.open(r"codeXcope.png")
     logo = logo.resize((200, 150), Image.LANCZOS)
     logo = ImageTk.PhotoImage(logo)
@@ -0,0 +1,52 @@
+import mmap
+import os
+from compressed_io import is_compressed, open_binary
+
+
+# function to yield only the lines of a file that contain a match.
+# the file is memory mapped and the raw bytes are searched directly, with bytes.find for a plain bytes pattern
+# or with a compiled bytes regex, so only the matching lines are ever decoded into a string.
+# start and end limit the search to one byte range of the file.
+# a compressed file cannot be memory mapped, its decompressed lines are searched one by one instead.
+def iter_matching_lines(file_path, pattern, start=0, end=None):
+    if is_compressed(file_path):
+        yield from _iter_matching_stream_lines(file_path, pattern)
+        return
+
+    with open(file_path, "rb") as file:
+        # an empty file cannot be memory mapped.
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if end is None or end > len(mapped):
+                end = len(mapped)
+
+            position = start
+            while position < end:
+                if isinstance(pattern, bytes):
+                    found = mapped.find(pattern, position, end)
+                else:
+                    match = pattern.search(mapped, position, end)
+                    found = match.start() if match else -1
+                if found == -1:
+                    break
+
+                # widen the match to the whole line it sits on.
+                line_start = mapped.rfind(b"\n", position, found) + 1 or position
+                line_end = mapped.find(b"\n", found, end)
+                line_end = end if line_end == -1 else line_end + 1
+
+                yield mapped[line_start:line_end].decode("utf-8", errors="replace")
+                position = line_end
+
+
+def _iter_matching_stream_lines(file_path, pattern):
+    with open_binary(file_path) as file:
+        for line in file:
+            if isinstance(pattern, bytes):
+                matched = pattern in line
+            else:
+                matched = pattern.search(line) is not None
+            if matched:
+                yield line.decode("utf-8", errors="replace")
@@ -0,0 +1,67 @@
+import csv
+import io
+import re
+
+# how many characters are gathered before they are written to the file in one call.
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# the characters that make csv.writer quote a field, with the default dialect.
+_NEEDS_QUOTES = re.compile(r'[",\r\n]')
+
+
+# function to format one field the way csv.writer formats a single column row, without the line ending.
+# an empty field is written as "" so the row is not read back as a blank line.
+def format_field(value):
+    if not value:
+        return '""'
+    if _NEEDS_QUOTES.search(value) is None:
+        return value
+    return '"' + value.replace('"', '""') + '"'
+
+
+class BufferedCsvWriter:
+    """A csv writer that gathers the rows in one large buffer and writes it to the file in big chunks.
+
+    The rows are written exactly as csv.writer writes them. Single column outputs
+    can use write_field, which skips the row list and the csv module altogether.
+    The writer must be flushed (or used as a context manager) before the file is closed.
+    """
+
+    def __init__(self, file, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.file = file
+        self.buffer_size = buffer_size
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer)
+        self._pending = 0
+
+    def write_field(self, value):
+        """Write a single column row from its string value, returns the characters written."""
+        text = format_field(value) + "\r\n"
+        self._pending += self._buffer.write(text)
+        if self._pending >= self.buffer_size:
+            self.flush()
+        return len(text)
+
+    def writerow(self, row):
+        written = self._csv.writerow(row)
+        self._pending += written
+        if self._pending >= self.buffer_size:
+            self.flush()
+        return written
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        if self._pending:
+            self.file.write(self._buffer.getvalue())
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
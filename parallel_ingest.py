@@ -0,0 +1,134 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from compressed_io import is_compressed, open_text
+from mmap_reader import iter_matching_lines
+
+# size of the byte ranges handed to the workers, small enough to keep each worker's memory bounded.
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# how many ranges per worker are submitted ahead of the one being written, this bounds the results held in memory.
+IN_FLIGHT_RANGES_PER_WORKER = 2
+
+
+# function to split a file into byte ranges that always start and end on a line boundary.
+# start and end limit the split to one part of the file, start must be the beginning of a line.
+def split_file_ranges(file_path, parts, start=0, end=None):
+    if end is None:
+        end = os.path.getsize(file_path)
+    if end <= start:
+        return []
+
+    step = max(1, (end - start) // max(1, parts))
+    boundaries = [start]
+    with open(file_path, "rb") as file:
+        for i in range(1, parts):
+            position = max(start + i * step, boundaries[-1])
+            if position >= end:
+                break
+            # move to the start of the next line so no line is split between two ranges.
+            file.seek(position)
+            file.readline()
+            position = file.tell()
+            if position >= end:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(end)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+# function to read the lines of one byte range of a file.
+def iter_range_lines(file_path, start, end):
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+
+# function to read the lines of one byte range of a file, only decoding the lines that match the prefilter.
+def _read_lines(file_path, start, end, prefilter):
+    if prefilter is None:
+        return iter_range_lines(file_path, start, end)
+    return iter_matching_lines(file_path, prefilter, start, end)
+
+
+# function run inside a worker, it classifies one byte range and groups the rows by output.
+def _classify_range(file_path, classify, prefilter, byte_range):
+    start, end = byte_range
+    outputs = {}
+    for output, row in classify(_read_lines(file_path, start, end, prefilter)):
+        outputs.setdefault(output, []).append(row)
+    return outputs
+
+
+# function to classify every line of a file into (output, row) pairs.
+# the classify function takes an iterable of lines and yields the output name and the csv row for each match.
+# with more than one worker the file is split into newline-aligned byte ranges that are classified in a process pool,
+# the results are still yielded in the original line order for every output.
+# the optional prefilter is a bytes pattern or compiled bytes regex, only the lines that contain it are classified.
+# start and end limit the run to one part of the file, used by the incremental mode to only read the new tail.
+def iter_classified(
+    file_path,
+    classify,
+    workers=None,
+    prefilter=None,
+    start=0,
+    end=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    # a compressed file is decompressed as one stream, the byte ranges only apply to plain files.
+    if is_compressed(file_path):
+        if prefilter is not None:
+            yield from classify(iter_matching_lines(file_path, prefilter))
+            return
+        with open_text(file_path, errors="replace") as file:
+            yield from classify(file)
+        return
+
+    if not workers or workers <= 1:
+        if prefilter is not None:
+            yield from classify(iter_matching_lines(file_path, prefilter, start, end))
+            return
+        if start or end is not None:
+            yield from classify(
+                iter_range_lines(
+                    file_path, start, os.path.getsize(file_path) if end is None else end
+                )
+            )
+            return
+        with open(file_path, "r") as file:
+            yield from classify(file)
+        return
+
+    if end is None:
+        end = os.path.getsize(file_path)
+    parts = max(workers, -(-(end - start) // chunk_size))
+    byte_ranges = split_file_ranges(file_path, parts, start, end)
+
+    classify_range = partial(_classify_range, file_path, classify, prefilter)
+    pending_ranges = iter(byte_ranges)
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # only a window of ranges is submitted, so finished results cannot pile up while the rows are written.
+        for byte_range in islice(pending_ranges, IN_FLIGHT_RANGES_PER_WORKER * workers):
+            in_flight.append(executor.submit(classify_range, byte_range))
+
+        # the results are consumed in the order of the ranges, so the merged output keeps the line order.
+        while in_flight:
+            outputs = in_flight.popleft().result()
+            byte_range = next(pending_ranges, None)
+            if byte_range is not None:
+                in_flight.append(executor.submit(classify_range, byte_range))
+            for output, rows in outputs.items():
+                for row in rows:
+                    yield output, row
+            # drop the rows of this range before waiting on the next one.
+            del outputs
@@ -1,93 +1,145 @@
 import os
-import csv
 import re
 from datetime import date
+from checkpoint import (
+    NEW_FILE,
+    clear_checkpoint,
+    output_mode,
+    pending_range,
+    save_checkpoint,
+)
+from compressed_io import open_text, with_compression
 from create_folder import create_folder
+from instrumentation import count_input_lines, file_size, stage, timed_writer
+from keyword_matcher import FUND_TRANSFER_MATCHER
+from output_writer import BufferedCsvWriter
+from parallel_ingest import iter_classified
+
+SOURCE_TXN_ID_PATTERN = re.compile(r"source_txn_id: (\S+)")
+
+
+# function to classify the fund transfer log lines.
+# yields the output name and the value of the single column row for every output a line belongs to.
+def classify_fund_transfer_lines(lines):
+    for line in lines:
+        # scan the line once and get every output it belongs to.
+        categories = FUND_TRANSFER_MATCHER.categories(line)
+        if not categories:
+            continue
+
+        # the raw ec2 logs and the source transaction ids of the sent SMS.
+        if "raw_ec2" in categories:
+            yield "raw_ec2", line.strip()
+            if "source_txn_id" in line:
+                match = SOURCE_TXN_ID_PATTERN.search(line)
+                if match:
+                    yield "src_txn_ids", match.group(1)
+
+        # the raw HTTP status 200 OK.
+        if "status_200_ok" in categories:
+            yield "status_200_ok", line.strip()
+
+        # the unsuccessful statuses.
+        if "failed_transaction" in categories:
+            yield "failed_transactions", line.strip()
 
 
 # function to process the txt file, which is the fund transfer logs.
-def process_fund_transfer_logs(file_path):
+# the file is streamed in a single pass, so memory use stays flat no matter how big the log is.
+# with workers set to more than one, the file is classified in parallel by a process pool.
+# with incremental set, only the lines added since the last incremental run are processed and appended to the outputs,
+# a rotated or truncated file is read again from its start and appended too. reset starts the outputs over.
+# the input can be compressed (.gz, .bz2, .xz or .zst), and compress_output ("gzip", "bz2", "xz" or "zstd")
+# compresses the large raw ec2 and raw 200 OK outputs as they are written.
+def process_fund_transfer_logs(
+    file_path, workers=None, incremental=False, compress_output=None, reset=False
+):
     base_path = os.path.dirname(file_path)
     date_today = date.today().strftime("%Y-%m-%d")
 
     # create folder for each file using the create_folder function.
-    folder_for_raw_ec2_logs = create_folder(base_path, "Ec2 Logs (Raw)")
-    folder_for_raw_status_200_OK = create_folder(base_path, "HTTP Status 200 OK (Raw)")
-    folder_for_unsuccessful_transactions = create_folder(
-        base_path, "Ec2 Failed Transactions"
-    )
-
-    folder_for_src_txn_id_200_OK = create_folder(
-        base_path, "HTTP Status 200 OK (Source Transaction IDs)"
-    )
-
-    with open(file_path, "r") as file:
-        content = file.readlines()
+    with stage("fund_transfer.create_folders"):
+        folder_for_raw_ec2_logs = create_folder(base_path, "Ec2 Logs (Raw)")
+        folder_for_raw_status_200_OK = create_folder(
+            base_path, "HTTP Status 200 OK (Raw)"
+        )
+        folder_for_unsuccessful_transactions = create_folder(
+            base_path, "Ec2 Failed Transactions"
+        )
 
-    find_sending_sms = [line for line in content if "sending SMS to" in line]
-    find_status_200_ok = [
-        line for line in content if "SMS sender response code: 200 OK" in line
-    ]
-    find_error_responses = [
-        line
-        for line in content
-        if any(
-            keyword in line
-            for keyword in [
-                "HTTP Status Code: ",
-                "I/O",
-                "Unexpected error:",
-                "error_message:",
-                "Response Body:",
-            ]
+        folder_for_src_txn_id_200_OK = create_folder(
+            base_path, "HTTP Status 200 OK (Source Transaction IDs)"
         )
-    ]
 
-    # save the raw ec2 logs.
-    with open(
-        os.path.join(folder_for_raw_ec2_logs, f"{date_today}_raw_ec2_logs.csv"),
-        "w",
-        newline="",
-    ) as f:
-        writer = csv.writer(f)
-        writer.writerows([[line.strip()] for line in find_sending_sms])
+    # work out where to resume, only a run without a checkpoint overwrites the outputs.
+    start, end, reason = (
+        pending_range(file_path, reset) if incremental else (0, None, NEW_FILE)
+    )
+    mode = output_mode(reason)
+    # the input lines are counted before the stage so the count is not part of its time, only while tracing.
+    input_lines = count_input_lines(file_path, start, end)
 
-    # save the raw HTTP status 200 OK.
-    with open(
-        os.path.join(
-            folder_for_raw_status_200_OK, f"{date_today}_raw_status_200_OK.csv"
+    # open every output once and send each line to the writers it belongs to.
+    # every output is a single column, its rows are gathered in a large buffer and written in big chunks.
+    # the classify stage includes the writing, the write_csv stage is the writing alone.
+    with stage("fund_transfer.classify") as measurement, open_text(
+        with_compression(
+            os.path.join(folder_for_raw_ec2_logs, f"{date_today}_raw_ec2_logs.csv"),
+            compress_output,
         ),
-        "w",
+        mode,
         newline="",
-    ) as f:
-        writer = csv.writer(f)
-        writer.writerows([[line.strip()] for line in find_status_200_ok])
-
-    # save the unsuccessful statuses.
-    with open(
+    ) as raw_ec2_file, open_text(
+        with_compression(
+            os.path.join(
+                folder_for_raw_status_200_OK, f"{date_today}_raw_status_200_OK.csv"
+            ),
+            compress_output,
+        ),
+        mode,
+        newline="",
+    ) as status_200_ok_file, open(
         os.path.join(
             folder_for_unsuccessful_transactions,
             f"{date_today}_ec2_failed_transactions.csv",
         ),
-        "w",
+        mode,
         newline="",
-    ) as f:
-        writer = csv.writer(f)
-        writer.writerows([[line.strip()] for line in find_error_responses])
-
-    # process the cleaned logs
-    src_txn_ids = [
-        re.search(r"source_txn_id: (\S+)", line).group(1)
-        for line in find_sending_sms
-        if "source_txn_id" in line
-    ]
-
-    with open(
+    ) as failed_transactions_file, open(
         os.path.join(
             folder_for_src_txn_id_200_OK, f"{date_today}_src_txn_ids_200_ok.csv"
         ),
-        "w",
+        mode,
         newline="",
-    ) as f:
-        writer = csv.writer(f)
-        writer.writerows([[id] for id in src_txn_ids])
+    ) as src_txn_ids_file:
+        measurement.bytes_read = (file_size(file_path) if end is None else end) - start
+        measurement.lines = input_lines
+        writers = {
+            output: timed_writer(BufferedCsvWriter(file), "fund_transfer.write_csv")
+            for output, file in [
+                ("raw_ec2", raw_ec2_file),
+                ("status_200_ok", status_200_ok_file),
+                ("failed_transactions", failed_transactions_file),
+                ("src_txn_ids", src_txn_ids_file),
+            ]
+        }
+
+        # most lines carry a keyword, so they are classified directly without a byte prefilter,
+        # which would only scan every matching line twice.
+        try:
+            for output, value in iter_classified(
+                file_path,
+                classify_fund_transfer_lines,
+                workers,
+                start=start,
+                end=end,
+            ):
+                writers[output].write_field(value)
+        finally:
+            for writer in writers.values():
+                writer.flush()
+
+    if incremental:
+        save_checkpoint(file_path, end)
+    else:
+        clear_checkpoint(file_path)
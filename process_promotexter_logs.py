@@ -1,37 +1,77 @@
 import os
-import csv
+from checkpoint import (
+    NEW_FILE,
+    clear_checkpoint,
+    output_mode,
+    pending_range,
+    save_checkpoint,
+)
 from create_folder import create_folder
+from instrumentation import count_input_lines, file_size, stage, timed_writer
+from output_writer import BufferedCsvWriter
 from datetime import date
+from parallel_ingest import iter_classified
+
+BOUNTIPLY_TARGET_MESSAGE = "Tiwala Partner, we are happy to inform you that your GCash claim has now been credited."
+
+
+# function to classify the promotexter log lines.
+# yields the record, the value of a single column row, for every line that contains the bountiply target message.
+def classify_promotexter_lines(lines):
+    for line in lines:
+        #  check if the line contains the target message.
+        if BOUNTIPLY_TARGET_MESSAGE in line:
+            #  extract the line and remove the word before and after the target message.
+            extracted_part_of_the_line = (
+                line.split(BOUNTIPLY_TARGET_MESSAGE)[0] + BOUNTIPLY_TARGET_MESSAGE
+            )
+            yield "promotexter", extracted_part_of_the_line.strip()
 
 
 # function to process the promotexter logs.
 # This is the sms that is sent from both bountiply and syngenta, we only need to get the message that is from bountiply.
-def process_promotexter_data(file_path):
+# with workers set to more than one, the file is classified in parallel by a process pool.
+# with incremental set, only the lines added since the last incremental run are processed and appended to the output,
+# a rotated or truncated file is read again from its start and appended too. reset starts the output over.
+def process_promotexter_data(file_path, workers=None, incremental=False, reset=False):
     base_path = os.path.dirname(file_path)
     date_today = date.today().strftime("%Y-%m-%d")
-    folder_for_promotexter = create_folder(base_path, "Promotexter Records")
-
-    bountiply_target_message = "Tiwala Partner, we are happy to inform you that your GCash claim has now been credited."
-    extracted_records = []
-
-    # open the file in read mode and iterate over each line in the file.
-    with open(file_path, "r") as file:
-        for line in file:
-            #  check if the line contains the target message.
-            if bountiply_target_message in line:
-                #  extract the line and remove the word before and after the target message.
-                extracted_part_of_the_line = (
-                    line.split(bountiply_target_message)[0] + bountiply_target_message
-                )
-                extracted_records.append(extracted_part_of_the_line.strip())
-
-    with open(
+    with stage("promotexter.create_folders"):
+        folder_for_promotexter = create_folder(base_path, "Promotexter Records")
+
+    # work out where to resume, only a run without a checkpoint overwrites the output.
+    start, end, reason = (
+        pending_range(file_path, reset) if incremental else (0, None, NEW_FILE)
+    )
+    # the input lines are counted before the stage so the count is not part of its time, only while tracing.
+    input_lines = count_input_lines(file_path, start, end)
+
+    # the classify stage includes the writing, the write_csv stage is the writing alone.
+    with stage("promotexter.classify") as measurement, open(
         os.path.join(
             folder_for_promotexter, f"{date_today}_records_from_promotexter.csv"
         ),
-        "w",
+        output_mode(reason),
         newline="",
     ) as f:
-        writer = csv.writer(f)
-        for log in extracted_records:
-            writer.writerow([log])
+        measurement.bytes_read = (file_size(file_path) if end is None else end) - start
+        measurement.lines = input_lines
+        writer = timed_writer(BufferedCsvWriter(f), "promotexter.write_csv")
+        # only the lines with the target message are decoded and classified.
+        try:
+            for _, record in iter_classified(
+                file_path,
+                classify_promotexter_lines,
+                workers,
+                prefilter=BOUNTIPLY_TARGET_MESSAGE.encode("utf-8"),
+                start=start,
+                end=end,
+            ):
+                writer.write_field(record)
+        finally:
+            writer.flush()
+
+    if incremental:
+        save_checkpoint(file_path, end)
+    else:
+        clear_checkpoint(file_path)
@@ -1,37 +1,112 @@
 import os
 import csv
 from create_folder import create_folder
+from instrumentation import count_input_lines, file_size, stage, timed_writer
+from output_writer import BufferedCsvWriter
 from datetime import date
+from functools import partial
+from compressed_io import is_compressed, open_binary
+from keyword_matcher import RDS_FAILURE_CODES, RDS_STATUS_MATCHER, RDS_SUCCESS_CODES
+from parallel_ingest import iter_classified
+
+# the status values of a transaction, the negative codes are families such as -2001 so they match by prefix.
+RDS_SUCCESS_STATUSES = frozenset(RDS_SUCCESS_CODES)
+RDS_FAILURE_STATUSES = frozenset(RDS_FAILURE_CODES)
+RDS_FAILURE_STATUS_PREFIXES = tuple(
+    code for code in RDS_FAILURE_CODES if code[0] == "-"
+)
+
+
+# function to classify the status value of a rds row.
+# returns "successful", "failed" or None when the status is not a transaction code.
+def classify_rds_status(status):
+    status = status.strip().upper()
+    if status in RDS_SUCCESS_STATUSES:
+        return "successful"
+    if status in RDS_FAILURE_STATUSES or status.startswith(RDS_FAILURE_STATUS_PREFIXES):
+        return "failed"
+    return None
+
+
+# function to classify the rds log lines.
+# yields "successful" or "failed" with the csv row for every transaction row.
+# when the index of the status column is known only that cell is checked, otherwise every cell is scanned for the codes.
+# in parallel mode the lines of one byte range are parsed on their own, so a record must not span several lines.
+def classify_rds_lines(lines, status_index=None):
+    if status_index is not None:
+        for row in csv.reader(lines):
+            if len(row) > status_index:
+                category = classify_rds_status(row[status_index])
+                if category:
+                    yield category, row
+        return
+
+    for row in csv.reader(lines):
+        # scan the row once for both the success and the failure codes.
+        categories = RDS_STATUS_MATCHER.row_categories(row)
+        # First check if it's a successful transaction (contains "TS")
+        if "successful" in categories:
+            yield "successful", row
+        # If it's not successful, check if it contains any failure codes
+        elif "failed" in categories:
+            yield "failed", row
+
+
+# function to find the index of the status column of a header row, None when there is none.
+def find_status_column(headers):
+    for i, header in enumerate(headers):
+        if "status" in header.lower():
+            return i
+    return None
+
+
+# function to check if a row of a rds output is the header kept from the export.
+# a transaction row always carries a status code, the header never does.
+def is_rds_header(row):
+    return find_status_column(row) is not None and not any(
+        classify_rds_status(cell) for cell in row
+    )
+
+
+# function to read the header of the rds export.
+# returns the header row, its length in bytes and the index of the status column (None when there is none).
+def read_rds_header(file_path):
+    with open_binary(file_path) as file:
+        header_line = file.readline()
+
+    headers = next(csv.reader([header_line.decode("utf-8-sig", errors="replace")]), [])
+    return headers, len(header_line), find_status_column(headers)
 
 
 # function to process the rds logs.
-def process_rds_logs(file_path):
+# the rows are classified on their status column, exports without one fall back to scanning every cell.
+# with workers set to more than one, the file is classified in parallel by a process pool.
+def process_rds_logs(file_path, workers=None):
     base_path = os.path.dirname(file_path)
     date_today = date.today().strftime("%Y-%m-%d")
-    folder_for_rds_records = create_folder(base_path, "RDS Records")
-    folder_for_rds_failed_transactions = create_folder(
-        folder_for_rds_records, "RDS Failed Transactions"
-    )
+    with stage("rds.create_folders"):
+        folder_for_rds_records = create_folder(base_path, "RDS Records")
+        folder_for_rds_failed_transactions = create_folder(
+            folder_for_rds_records, "RDS Failed Transactions"
+        )
 
-    with open(file_path, "r") as file:
-        reader = csv.reader(file)
-        successful_transactions = []
-        failed_transactions = []
+    headers, header_size, status_index = read_rds_header(file_path)
+    if status_index is None:
+        classify, start = classify_rds_lines, 0
+    else:
+        # the header is skipped, the partial keeps the classifier picklable for the process pool.
+        # a compressed file is read from its start, its header has no status code so it is not classified anyway.
+        classify = partial(classify_rds_lines, status_index=status_index)
+        start = 0 if is_compressed(file_path) else header_size
 
-        failure_codes = ["TF", "SC", "SP", "-20", "RT"]
-
-        # Let's add a header row print to debug
-        for row in reader:
-            # First check if it's a successful transaction (contains "TS")
-            if any("TS" in cell for cell in row):
-                successful_transactions.append(row)
-            # If it's not successful, check if it contains any failure codes
-            else:
-                if any(code in cell for cell in row for code in failure_codes):
-                    failed_transactions.append(row)
+    # the input lines are counted before the stage so the count is not part of its time, only while tracing.
+    input_lines = count_input_lines(file_path, start)
 
     # Save the successful transactions
-    with open(
+    # the rows are gathered in large buffers and written in big chunks.
+    failed_file = None
+    # the classify stage includes the writing, the write_csv stage is the writing alone.
+    with stage("rds.classify") as measurement, open(
         os.path.join(
             folder_for_rds_records,
             f"{date_today}_rds_sucessful_transactions.csv",
@@ -39,18 +114,39 @@ def process_rds_logs(file_path):
         "w",
         newline="",
     ) as f:
-        writer = csv.writer(f)
-        writer.writerows(successful_transactions)
-
-    # Save failed transactions
-    if failed_transactions:
-        with open(
-            os.path.join(
-                folder_for_rds_failed_transactions,
-                f"{date_today}_rds_failed_transactions.csv",
-            ),
-            "w",
-            newline="",
-        ) as f:
-            writer = csv.writer(f)
-            writer.writerows(failed_transactions)
+        measurement.bytes_read = file_size(file_path) - start
+        measurement.lines = input_lines
+        successful_writer = timed_writer(BufferedCsvWriter(f), "rds.write_csv")
+        # keep the header so the id and name columns can be found by the reconciliation.
+        if status_index is not None:
+            successful_writer.writerow(headers)
+        try:
+            for output, row in iter_classified(
+                file_path, classify, workers, start=start
+            ):
+                if output == "successful":
+                    successful_writer.writerow(row)
+                    continue
+
+                # Save failed transactions, the file is only created when there is one.
+                if failed_file is None:
+                    failed_file = open(
+                        os.path.join(
+                            folder_for_rds_failed_transactions,
+                            f"{date_today}_rds_failed_transactions.csv",
+                        ),
+                        "w",
+                        newline="",
+                    )
+                    failed_writer = timed_writer(
+                        BufferedCsvWriter(failed_file), "rds.write_csv"
+                    )
+                    # keep the header so the message column of the errors can be found.
+                    if status_index is not None:
+                        failed_writer.writerow(headers)
+                failed_writer.writerow(row)
+        finally:
+            successful_writer.flush()
+            if failed_file is not None:
+                failed_writer.flush()
+                failed_file.close()
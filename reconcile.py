@@ -0,0 +1,122 @@
+import csv
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from compressed_io import open_text
+from instrumentation import traced
+from record_store import LogFile, RecordStore, csv_files
+
+# the id and name columns of a rds output are found by these header names.
+RDS_ID_HEADER = "source_txn_id"
+RDS_NAME_HEADER = "name"
+# the column order of the rds export, used for the outputs written without a header by older runs.
+RDS_ID_COLUMN = 0
+RDS_NAME_COLUMN = 1
+
+
+class ReconciliationReport(NamedTuple):
+    """The result of joining the sent SMS, the successful rds transactions and the promotexter records.
+
+    The ids of every source are held in a compact IdStore, see id_store.
+    """
+
+    sms: "IdStore"
+    rds: "IdStore"
+    promotexter: "IdStore"
+    sms_without_rds: List[str]
+    rds_without_sms: List[str]
+    rds_names: Dict[str, Optional[str]]
+
+    def duplicate_transactions(self):
+        """Return (source_txn_id, name) of every id sent or credited more than once."""
+        duplicates = dict.fromkeys(self.rds.duplicates)
+        duplicates.update(dict.fromkeys(self.sms.duplicates))
+        return [(txn_id, self.rds_names.get(txn_id)) for txn_id in duplicates]
+
+
+# function to stream the csv rows of every file of a folder.
+def _iter_folder_rows(folder_path) -> Iterator[List[str]]:
+    for _, file_path in csv_files(folder_path):
+        with open_text(file_path, newline="") as f:
+            yield from csv.reader(f)
+
+
+# function to stream the csv rows of log files already loaded into a record store.
+def _iter_loaded_rows(log_files: List[LogFile]) -> Iterator[List[str]]:
+    for log_file in log_files:
+        yield from csv.reader(log_file.lines or [])
+
+
+# function to stream the source transaction ids of the sent SMS, one id per row.
+def iter_sms_ids(folder_path) -> Iterator[str]:
+    for row in _iter_folder_rows(folder_path):
+        if row and row[0]:
+            yield row[0].strip()
+
+
+# function to find the id and name columns of a rds output from its header, or the export column order without one.
+def _rds_columns(header: Optional[List[str]]) -> Tuple[int, Optional[int]]:
+    if not header:
+        return RDS_ID_COLUMN, RDS_NAME_COLUMN
+    headers = [cell.strip().lower() for cell in header]
+    id_column = (
+        headers.index(RDS_ID_HEADER) if RDS_ID_HEADER in headers else RDS_ID_COLUMN
+    )
+    name_column = headers.index(RDS_NAME_HEADER) if RDS_NAME_HEADER in headers else None
+    return id_column, name_column
+
+
+# function to stream (source_txn_id, name) of the successful rds transactions loaded into a record store.
+def iter_rds_ids(log_files: List[LogFile]) -> Iterator[tuple]:
+    for log_file in log_files:
+        id_column, name_column = _rds_columns(log_file.header)
+        for row in csv.reader(log_file.lines or []):
+            if len(row) > id_column and row[id_column]:
+                name = (
+                    row[name_column]
+                    if name_column is not None and len(row) > name_column
+                    else None
+                )
+                yield row[id_column].strip(), name
+
+
+# function to stream the promotexter records, they carry no transaction id so the whole record is the key.
+def iter_promotexter_records(log_files: List[LogFile]) -> Iterator[str]:
+    for row in _iter_loaded_rows(log_files):
+        if row:
+            yield ",".join(row).strip()
+
+
+# function to reconcile the sources of a record store.
+# reports the duplicates of every source, the SMS sent without a successful rds transaction
+# and the successful rds transactions without an SMS.
+# the rds and promotexter ids come from the lines the store already holds, only the SMS ids are read from disk.
+# the names are only kept for the duplicated rds ids, they are looked up in a second pass when there are any.
+@traced(
+    "reconcile",
+    count_lines=lambda report: report.sms.rows
+    + report.rds.rows
+    + report.promotexter.rows,
+)
+def reconcile(store: RecordStore) -> ReconciliationReport:
+    # numpy is only needed once a reconciliation runs.
+    from id_store import IdStore
+
+    sms = IdStore.from_ids(iter_sms_ids(store.source_folders()["sms_ids"]))
+    rds = IdStore.from_ids(txn_id for txn_id, _ in iter_rds_ids(store.rds))
+    promotexter = IdStore.from_ids(iter_promotexter_records(store.promotexter))
+
+    rds_names = {}
+    duplicated = rds.duplicates.keys() | sms.duplicates.keys()
+    if duplicated:
+        for txn_id, name in iter_rds_ids(store.rds):
+            if txn_id in duplicated:
+                rds_names.setdefault(txn_id, name)
+
+    return ReconciliationReport(
+        sms=sms,
+        rds=rds,
+        promotexter=promotexter,
+        sms_without_rds=sms.missing_from(rds),
+        rds_without_sms=rds.missing_from(sms),
+        rds_names=rds_names,
+    )
@@ -0,0 +1,142 @@
+import csv
+import os
+from functools import partial
+from async_ingest import DEFAULT_CONCURRENCY, map_files
+from compressed_io import open_binary, open_text, strip_compression
+from instrumentation import traced
+from process_rds_logs import is_rds_header
+from typing import Dict, List, NamedTuple, Optional
+
+# the folders written by the processors, older runs used a lowercase "records" for the promotexter folder.
+EC2_RAW_FOLDERS = ["Ec2 Logs (Raw)"]
+RDS_FOLDERS = ["RDS Records"]
+PROMOTEXTER_FOLDERS = ["Promotexter Records", "Promotexter records"]
+SMS_ID_FOLDERS = ["HTTP Status 200 OK (Source Transaction IDs)"]
+
+
+class LogFile(NamedTuple):
+    """One csv file of a source, with its line count and, when loaded, its lines.
+
+    The header kept by a processor is split off, it is neither counted nor part of the lines.
+    """
+
+    name: str
+    path: str
+    line_count: int
+    lines: Optional[List[str]]
+    header: Optional[List[str]] = None
+
+
+class RecordStore:
+    """The log files of a base folder, scanned once and shared by the summary and the AI analysis."""
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+        self.ec2_raw: List[LogFile] = []
+        self.rds: List[LogFile] = []
+        self.promotexter: List[LogFile] = []
+
+    @staticmethod
+    def all_lines(log_files: List[LogFile]) -> List[str]:
+        """Return the lines of every file of a source, in file order."""
+        lines = []
+        for log_file in log_files:
+            lines.extend(log_file.lines or [])
+        return lines
+
+    def source_folders(self) -> Dict[str, Optional[str]]:
+        """Return the folder found for every source, None when it does not exist."""
+        return {
+            "ec2_raw": _find_folder(self.base_path, EC2_RAW_FOLDERS),
+            "rds": _find_folder(self.base_path, RDS_FOLDERS),
+            "promotexter": _find_folder(self.base_path, PROMOTEXTER_FOLDERS),
+            "sms_ids": _find_folder(self.base_path, SMS_ID_FOLDERS),
+        }
+
+
+# function to count the lines of a file, reading it in large binary blocks (decompressed when it is compressed).
+def count_lines(file_path):
+    line_count = 0
+    last_block = b""
+    with open_binary(file_path) as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            line_count += block.count(b"\n")
+            last_block = block
+    # a last line without a newline still counts.
+    if last_block and not last_block.endswith(b"\n"):
+        line_count += 1
+    return line_count
+
+
+def _find_folder(base_path, folder_names):
+    for folder_name in folder_names:
+        folder_path = os.path.join(base_path, folder_name)
+        if os.path.isdir(folder_path):
+            return folder_path
+    return None
+
+
+# function to list the csv files of a folder as (filename, path), none when the folder is None.
+# compressed csv files such as .csv.gz are listed too.
+def csv_files(folder_path):
+    if folder_path is None:
+        return []
+    return [
+        (filename, os.path.join(folder_path, filename))
+        for filename in os.listdir(folder_path)
+        if strip_compression(filename).endswith(".csv")
+    ]
+
+
+def _read_log_file(filename, file_path, is_header=None):
+    with open_text(file_path) as f:
+        lines = f.readlines()
+
+    header = None
+    if is_header is not None and lines:
+        first_row = next(csv.reader(lines[:1]), [])
+        if is_header(first_row):
+            header = first_row
+            del lines[0]
+    return LogFile(filename, file_path, len(lines), lines, header)
+
+
+def _load_log_file(cache, job):
+    source, filename, file_path = job
+    if source == "rds":
+        return _read_log_file(filename, file_path, is_rds_header)
+    if source != "ec2_raw":
+        return _read_log_file(filename, file_path)
+
+    if cache is not None:
+        line_count = cache.get_or_compute(file_path, "line_count", count_lines)
+    else:
+        line_count = count_lines(file_path)
+    return LogFile(filename, file_path, line_count, None)
+
+
+# function to scan a base folder once into a record store.
+# the rds and promotexter lines are kept because both the summary and the AI analysis read them,
+# the raw ec2 logs are only counted, through the result cache when one is given.
+# up to concurrency files are read at once, the store keeps the listing order of every folder.
+@traced(
+    "load_record_store",
+    count_lines=lambda store: sum(
+        log_file.line_count
+        for log_file in store.ec2_raw + store.rds + store.promotexter
+    ),
+)
+def load_record_store(base_path, cache=None, concurrency=DEFAULT_CONCURRENCY):
+    store = RecordStore(base_path)
+    folders = store.source_folders()
+
+    jobs = [
+        (source, filename, file_path)
+        for source in ("ec2_raw", "rds", "promotexter")
+        for filename, file_path in csv_files(folders[source])
+    ]
+    log_files = map_files(partial(_load_log_file, cache), jobs, concurrency)
+    for (source, _, _), log_file in zip(jobs, log_files):
+        getattr(store, source).append(log_file)
+
+    return store
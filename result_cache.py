@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+
+# where the cached results are kept, can be moved with the CODEXCOPE_CACHE_DIR environment variable.
+DEFAULT_CACHE_DIR = os.environ.get(
+    "CODEXCOPE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "codexcope"),
+)
+# the oldest entries are evicted once the cache grows past this size.
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+# the content hash covers the first and the last block of the file, so it stays cheap on huge files.
+FINGERPRINT_BLOCK_SIZE = 64 * 1024
+
+
+# function to fingerprint a file by its path, size, modification time and a hash of its content.
+def file_fingerprint(file_path):
+    stat = os.stat(file_path)
+    content_hash = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        content_hash.update(file.read(FINGERPRINT_BLOCK_SIZE))
+        if stat.st_size > FINGERPRINT_BLOCK_SIZE:
+            file.seek(
+                max(FINGERPRINT_BLOCK_SIZE, stat.st_size - FINGERPRINT_BLOCK_SIZE)
+            )
+            content_hash.update(file.read())
+    return (
+        f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|"
+        f"{content_hash.hexdigest()}"
+    )
+
+
+# class to cache the results parsed from a file, such as line counts and extracted errors.
+# entries are addressed by the file fingerprint and the kind of result, so a changed file is never served stale data.
+class ResultCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, file_path, kind):
+        key = hashlib.sha256(
+            f"{kind}|{file_fingerprint(file_path)}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get_or_compute(self, file_path, kind, compute):
+        """Return the cached result of compute(file_path), computing and storing it on a miss."""
+        entry_path = self._entry_path(file_path, kind)
+        try:
+            with open(entry_path, "r") as f:
+                value = json.load(f)
+            # touch the entry so eviction removes the least recently used entries first.
+            os.utime(entry_path)
+            return value
+        except (OSError, ValueError):
+            pass
+
+        text = json.dumps(compute(file_path))
+        self._store(entry_path, text)
+        # return what a later cache hit would return, so both paths give the same types.
+        return json.loads(text)
+
+    def _store(self, entry_path, text):
+        # the cache is only an optimization, a read-only or full disk must not break the summary.
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temporary_path = f"{entry_path}.tmp"
+            with open(temporary_path, "w") as f:
+                f.write(text)
+            os.replace(temporary_path, entry_path)
+            self._evict()
+        except OSError as e:
+            print(f"Warning: could not write the result cache: {str(e)}")
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as scanned:
+            for entry in scanned:
+                if entry.name.endswith(".json"):
+                    # another thread may have evicted the entry in the meantime.
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+
+        # remove the least recently used entries until the cache fits again.
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
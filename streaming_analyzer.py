@@ -0,0 +1,271 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable
+
+from anomaly_detection import bucket_index
+from log_analyzer import LogAnalyzer
+from timestamp_parser import parse_timestamp
+
+CARRIER_PATTERN = re.compile(r"carrier[:\s]+(\w+)", re.IGNORECASE)
+
+
+class LatencySketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch).
+
+    Every value is counted in a logarithmic bucket, so the memory grows with
+    the range of the latencies and not with how many there are.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma**index / (self.gamma + 1)
+
+    def add(self, value: float) -> None:
+        """Count one value."""
+        self.count += 1
+        self.total += value
+        if value > 0:
+            self.positive[self._index(value)] += 1
+        elif value < 0:
+            self.negative[self._index(-value)] += 1
+        else:
+            self.zero_count += 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        """Add the values counted by another sketch with the same accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with a different accuracy")
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+
+    def mean(self) -> float:
+        """Return the exact mean of the counted values."""
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return the value at quantile q, within the relative accuracy."""
+        if not self.count:
+            return 0.0
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._value(index)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.positive))
+
+
+class StreamingLogAnalyzer:
+    """Analyze logs batch by batch with bounded memory.
+
+    Only counters and a latency sketch are kept, so analyzers that ran on
+    different file shards or nodes can be merged. report() returns the same
+    structure as LogAnalyzer.get_ai_insights. The anomaly options are the ones
+    of LogAnalyzer, with a resolution the volumes are also counted per bucket
+    of the whole time range.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        anomaly_method: str = "dbscan",
+        anomaly_resolution: str = None,
+        anomaly_threshold: float = 3.5,
+    ):
+        self.analyzer = LogAnalyzer(
+            anomaly_method=anomaly_method,
+            anomaly_resolution=anomaly_resolution,
+            anomaly_threshold=anomaly_threshold,
+        )
+        self.error_types = Counter()
+        self.successful_count = 0
+        self.failed_count = 0
+        self.hourly_volumes = Counter()
+        self.bucket_volumes = Counter()
+        self.sms_total = 0
+        self.sms_delivered = 0
+        self.carrier_stats: Dict[str, Dict[str, int]] = {}
+        self.latencies = LatencySketch(relative_accuracy)
+
+    def update(
+        self,
+        springboot_logs: Iterable[str] = (),
+        database_logs: Iterable[str] = (),
+        sms_logs: Iterable[str] = (),
+    ) -> "StreamingLogAnalyzer":
+        """Add a batch of log lines from any of the sources."""
+        resolution = self.analyzer.anomaly_resolution
+        for log in springboot_logs:
+            if self.analyzer._is_error(log):
+                self.error_types[self.analyzer._categorize_error(log)] += 1
+
+        for log in database_logs:
+            if self.analyzer._is_error(log):
+                self.error_types[self.analyzer._categorize_error(log)] += 1
+
+            # a line with both codes counts as a successful and as a failed transaction.
+            transactions = 0
+            if "TS" in log:
+                self.successful_count += 1
+                transactions += 1
+            if "TF" in log:
+                self.failed_count += 1
+                transactions += 1
+            if transactions:
+                ts = parse_timestamp(log)
+                if ts:
+                    self.hourly_volumes[ts.hour] += transactions
+                    if resolution:
+                        self.bucket_volumes[
+                            bucket_index(ts, resolution)
+                        ] += transactions
+
+        for log in sms_logs:
+            self.sms_total += 1
+            delivered = "200 OK" in log
+            if delivered:
+                self.sms_delivered += 1
+                send_time = parse_timestamp(log)
+                delivery_time = parse_timestamp(log.split("200 OK")[1])
+                if send_time and delivery_time:
+                    self.latencies.add((delivery_time - send_time).total_seconds())
+
+            carrier_match = CARRIER_PATTERN.search(log)
+            if carrier_match:
+                stats = self.carrier_stats.setdefault(
+                    carrier_match.group(1), {"total": 0, "successful": 0}
+                )
+                stats["total"] += 1
+                if delivered:
+                    stats["successful"] += 1
+
+        return self
+
+    def merge(self, other: "StreamingLogAnalyzer") -> "StreamingLogAnalyzer":
+        """Add the partial results of another analyzer to this one."""
+        if other.analyzer.anomaly_resolution != self.analyzer.anomaly_resolution:
+            raise ValueError(
+                "Cannot merge analyzers with a different anomaly resolution"
+            )
+        self.error_types.update(other.error_types)
+        self.successful_count += other.successful_count
+        self.failed_count += other.failed_count
+        self.hourly_volumes.update(other.hourly_volumes)
+        self.bucket_volumes.update(other.bucket_volumes)
+        self.sms_total += other.sms_total
+        self.sms_delivered += other.sms_delivered
+        for carrier, other_stats in other.carrier_stats.items():
+            stats = self.carrier_stats.setdefault(
+                carrier, {"total": 0, "successful": 0}
+            )
+            stats["total"] += other_stats["total"]
+            stats["successful"] += other_stats["successful"]
+        self.latencies.merge(other.latencies)
+        return self
+
+    def _latency_patterns(self) -> Dict:
+        if not self.latencies.count:
+            return {"average": 0, "median": 0, "p95": 0}
+        return {
+            "average": self.latencies.mean(),
+            "median": self.latencies.quantile(0.5),
+            "p95": self.latencies.quantile(0.95),
+        }
+
+    def _carrier_performance(self) -> Dict:
+        performance = {}
+        for carrier, stats in self.carrier_stats.items():
+            if stats["total"] > 0:
+                performance[carrier] = {
+                    "success_rate": (stats["successful"] / stats["total"]) * 100,
+                    "total_messages": stats["total"],
+                }
+        return performance
+
+    def report(self) -> Dict:
+        """Build the insights from the counters, in the structure of get_ai_insights."""
+        analyzer = self.analyzer
+
+        error_analysis = {
+            "common_patterns": self.error_types.most_common(),
+            "time_based_patterns": [],
+            "recommendations": analyzer._generate_recommendations(self.error_types),
+        }
+
+        transaction_analysis = {
+            "success_rate": 0.0,
+            "peak_hours": [],
+            "anomalies": [],
+            "recommendations": [],
+        }
+        total_txns = self.successful_count + self.failed_count
+        if total_txns > 0:
+            transaction_analysis["success_rate"] = (
+                self.successful_count / total_txns
+            ) * 100
+        hourly_volumes = dict(sorted(self.hourly_volumes.items()))
+        transaction_analysis["peak_hours"] = analyzer._identify_peak_hours(
+            hourly_volumes
+        )
+        if analyzer.anomaly_resolution:
+            transaction_analysis["anomalies"] = analyzer._detect_bucket_anomalies(
+                self.bucket_volumes
+            )
+        elif hourly_volumes:
+            transaction_analysis["anomalies"] = analyzer._detect_anomalies(
+                hourly_volumes
+            )
+        transaction_analysis["recommendations"] = (
+            analyzer._generate_transaction_recommendations(
+                transaction_analysis["success_rate"],
+                transaction_analysis["peak_hours"],
+                transaction_analysis["anomalies"],
+            )
+        )
+
+        sms_analysis = {
+            "delivery_rate": 0.0,
+            "latency_patterns": self._latency_patterns(),
+            "carrier_performance": self._carrier_performance(),
+            "recommendations": [],
+        }
+        if self.sms_total > 0:
+            sms_analysis["delivery_rate"] = (self.sms_delivered / self.sms_total) * 100
+        sms_analysis["recommendations"] = analyzer._generate_sms_recommendations(
+            sms_analysis
+        )
+
+        insights = {
+            "error_analysis": error_analysis,
+            "transaction_analysis": transaction_analysis,
+            "sms_analysis": sms_analysis,
+            "overall_recommendations": [],
+        }
+        insights["overall_recommendations"] = (
+            analyzer._generate_overall_recommendations(insights)
+        )
+        return insights
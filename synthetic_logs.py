@@ -0,0 +1,163 @@
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from process_promotexter_logs import BOUNTIPLY_TARGET_MESSAGE
+
+# the named sizes of a generated dataset, in lines per log.
+SIZES = {"10k": 10_000, "1m": 1_000_000, "50m": 50_000_000}
+
+# the share of every kind of ec2 fund transfer line, the weights do not need to add up to 1.
+DEFAULT_EC2_MIX = {
+    "sms_sent": 0.40,
+    "status_200_ok": 0.30,
+    "http_error": 0.10,
+    "io_error": 0.04,
+    "unexpected_error": 0.04,
+    "error_message": 0.02,
+    "noise": 0.10,
+}
+
+# the share of every rds status, "XX" is a status that is neither successful nor failed.
+DEFAULT_RDS_MIX = {
+    "TS": 0.70,
+    "TF": 0.10,
+    "SC": 0.06,
+    "SP": 0.03,
+    "RT": 0.04,
+    "-2001": 0.04,
+    "XX": 0.03,
+}
+
+# the share of promotexter messages that are the bountiply target message.
+DEFAULT_PROMOTEXTER_MIX = {"bountiply": 0.5, "other": 0.5}
+
+# the rds error messages of the failed statuses.
+RDS_MESSAGES = {
+    "TF": "NO RECORD ON FILE",
+    "SC": "EXCEEDS ACCOUNT AMOUNT LIMIT",
+    "SP": "SYSTEM FAILURE",
+    "RT": "SYSTEM FAILURE; CATCH ALL TRANSACTION PROCESSING ERROR CODE",
+    "-2001": "NO RECORD ON FILE",
+}
+
+NAMES = ["Juan Dela Cruz", "Maria Santos", "Jose Reyes", "Ana Garcia", "Pedro Bautista"]
+CARRIERS = ["Globe", "Smart", "DITO"]
+START_TIME = datetime(2024, 11, 20)
+
+# how many lines are drawn and written at a time.
+BATCH_SIZE = 10_000
+
+
+# the lines only use the seconds of one day, so every timestamp is formatted once.
+@lru_cache(maxsize=86400)
+def _timestamp(seconds):
+    return (START_TIME + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _batches(rng, mix, lines):
+    kinds, weights = list(mix), list(mix.values())
+    for start in range(0, lines, BATCH_SIZE):
+        count = min(BATCH_SIZE, lines - start)
+        yield start, rng.choices(kinds, weights, k=count)
+
+
+def _ec2_line(rng, kind, i, ts):
+    txn_id = f"TXN{i:010d}"
+    if kind == "sms_sent":
+        return f"{ts} INFO [fund-transfer] sending SMS to 0917{i % 10_000_000:07d} source_txn_id: {txn_id} amount: {rng.randint(100, 50_000)}.00\n"
+    if kind == "status_200_ok":
+        return (
+            f"{ts} INFO [fund-transfer] SMS sender response code: 200 OK for {txn_id}\n"
+        )
+    if kind == "http_error":
+        status = rng.choice([400, 404, 500, 502, 503])
+        return f"{ts} ERROR [fund-transfer] HTTP Status Code: {status} messages: Internal error for {txn_id}\n"
+    if kind == "io_error":
+        return f"{ts} ERROR [fund-transfer] I/O error on socket {rng.randint(1000, 9999)}\n"
+    if kind == "unexpected_error":
+        return f"{ts} WARN [fund-transfer] Unexpected error: timeout after {rng.randint(1000, 30_000)}ms\n"
+    if kind == "error_message":
+        return (
+            f"{ts} ERROR [fund-transfer] error_message: invalid account for {txn_id}\n"
+        )
+    return f"{ts} DEBUG [fund-transfer] heartbeat\n"
+
+
+# function to write a seeded ec2 fund transfer log, the mix sets the share of every kind of line.
+def generate_ec2_log(file_path, lines, seed=0, mix=None):
+    rng = random.Random(seed)
+    with open(file_path, "w") as f:
+        for start, kinds in _batches(rng, mix or DEFAULT_EC2_MIX, lines):
+            f.writelines(
+                _ec2_line(
+                    rng, kind, start + offset, _timestamp((start + offset) % 86400)
+                )
+                for offset, kind in enumerate(kinds)
+            )
+    return file_path
+
+
+# function to write a seeded rds export with a header, the mix sets the share of every status.
+def generate_rds_csv(file_path, lines, seed=0, mix=None):
+    rng = random.Random(seed)
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source_txn_id", "name", "status", "message", "created_at"])
+        for start, statuses in _batches(rng, mix or DEFAULT_RDS_MIX, lines):
+            writer.writerows(
+                [
+                    f"TXN{start + offset:010d}",
+                    rng.choice(NAMES),
+                    status,
+                    RDS_MESSAGES.get(status, "ok"),
+                    _timestamp(rng.randrange(86400)),
+                ]
+                for offset, status in enumerate(statuses)
+            )
+    return file_path
+
+
+# function to write a seeded promotexter log, the mix sets the share of bountiply messages.
+def generate_promotexter_log(file_path, lines, seed=0, mix=None):
+    rng = random.Random(seed)
+    with open(file_path, "w") as f:
+        for start, kinds in _batches(rng, mix or DEFAULT_PROMOTEXTER_MIX, lines):
+            rows = []
+            for offset, kind in enumerate(kinds):
+                i = start + offset
+                ts = _timestamp(i % 86400)
+                if kind == "bountiply":
+                    message = f"{BOUNTIPLY_TARGET_MESSAGE} Ref {i}"
+                else:
+                    message = f"Syngenta promo message {i}"
+                rows.append(
+                    f"{ts},0917{i % 10_000_000:07d},carrier: {rng.choice(CARRIERS)},{message}\n"
+                )
+            f.writelines(rows)
+    return file_path
+
+
+# function to write the three logs of a dataset into a folder, size is a number of lines or a name of SIZES.
+# returns the paths of the ec2, rds and promotexter logs.
+def generate_dataset(
+    folder, size="10k", seed=0, ec2_mix=None, rds_mix=None, promotexter_mix=None
+):
+    lines = SIZES[size] if isinstance(size, str) else size
+    os.makedirs(folder, exist_ok=True)
+    return {
+        "ec2": generate_ec2_log(
+            os.path.join(folder, "fund_transfer_logs.txt"), lines, seed, ec2_mix
+        ),
+        "rds": generate_rds_csv(
+            os.path.join(folder, "rds_logs.csv"), lines, seed + 1, rds_mix
+        ),
+        "promotexter": generate_promotexter_log(
+            os.path.join(folder, "promotexter_logs.txt"),
+            lines,
+            seed + 2,
+            promotexter_mix,
+        ),
+    }
@@ -0,0 +1,158 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# the placeholder written in place of the variable parts of a message.
+WILDCARD = "<*>"
+
+# tokens that are variable by nature and are masked before clustering.
+VARIABLE_TOKEN_PATTERN = re.compile(
+    r"^(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|0x[0-9a-fA-F]+"
+    r"|.*\d.*)$"
+)
+
+# HTTP status codes stay in the template, so 4xx and 5xx failures are not merged.
+STATUS_CODE_PATTERN = re.compile(r"^[1-5]\d{2}$")
+# the tokens a status code follows, compared without case and trailing ":" or "=".
+STATUS_CODE_LABELS = {"code", "status", "status_code", "http"}
+
+# ids shown as samples of a template, when a message carries one.
+TRANSACTION_ID_PATTERN = re.compile(
+    r"(?:source_txn_id|txn_id|transaction_id)[\"']?[:=\s]+[\"']?([\w-]+)", re.IGNORECASE
+)
+
+
+class LogCluster:
+    """A template of similar messages, with its count and a few sample ids."""
+
+    def __init__(self, tokens: List[str], max_samples: int):
+        self.tokens = tokens
+        self.count = 0
+        self.samples: List[str] = []
+        self.max_samples = max_samples
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def add(self, sample_id: Optional[str]) -> None:
+        self.count += 1
+        if sample_id is not None and len(self.samples) < self.max_samples:
+            self.samples.append(sample_id)
+
+
+class TemplateMiner:
+    """Cluster messages into templates in one streaming pass, like Drain.
+
+    Messages are split into tokens and variable tokens are masked. A message
+    is then only compared with the clusters that have the same token count
+    and the same leading literal tokens. It joins the most similar one when at
+    least similarity_threshold of the literal tokens match, and the tokens
+    that differ become wildcards. Otherwise it starts a new cluster.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.7,
+        prefix_depth: int = 2,
+        max_samples: int = 3,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.prefix_depth = prefix_depth
+        self.max_samples = max_samples
+        self.clusters: List[LogCluster] = []
+        self._groups: Dict[Tuple, List[LogCluster]] = {}
+
+    def _tokenize(self, message: str) -> List[str]:
+        tokens = []
+        previous = ""
+        for token in message.split():
+            is_status_code = (
+                STATUS_CODE_PATTERN.match(token)
+                and previous.rstrip(":=").lower() in STATUS_CODE_LABELS
+            )
+            if VARIABLE_TOKEN_PATTERN.match(token) and not is_status_code:
+                tokens.append(WILDCARD)
+            else:
+                tokens.append(token)
+            previous = token
+        return tokens
+
+    def _prefix(self, tokens: List[str]) -> Tuple:
+        literals = [token for token in tokens if token != WILDCARD]
+        # every other token with digits is masked, so the literal ones left are status codes.
+        status_codes = [token for token in literals if STATUS_CODE_PATTERN.match(token)]
+        return tuple(literals[: self.prefix_depth]) + tuple(status_codes)
+
+    def _similarity(self, template: List[str], tokens: List[str]) -> Tuple[float, int]:
+        same = 0
+        compared = 0
+        wildcards = 0
+        for template_token, token in zip(template, tokens):
+            if template_token == WILDCARD:
+                wildcards += 1
+            # only literal tokens count, two wildcards say nothing about the messages being alike.
+            if template_token == WILDCARD and token == WILDCARD:
+                continue
+            compared += 1
+            if template_token == token:
+                same += 1
+        return (same / compared if compared else 1.0), wildcards
+
+    def add(self, message: str, sample_id: Optional[str] = None) -> LogCluster:
+        """Add a message to its template and return the template's cluster."""
+        tokens = self._tokenize(message)
+        if not tokens:
+            tokens = [""]
+
+        # group by the token count, the leading literal tokens and the status codes, this is the prefix tree of Drain.
+        # the masked tokens are skipped, or the timestamp every line starts with would be the whole key.
+        key = (len(tokens),) + self._prefix(tokens)
+        group = self._groups.setdefault(key, [])
+
+        best_cluster = None
+        best_score = (-1.0, -1)
+        for cluster in group:
+            score = self._similarity(cluster.tokens, tokens)
+            if score > best_score:
+                best_cluster, best_score = cluster, score
+
+        if best_cluster is None or best_score[0] < self.similarity_threshold:
+            best_cluster = LogCluster(tokens, self.max_samples)
+            group.append(best_cluster)
+            self.clusters.append(best_cluster)
+        else:
+            best_cluster.tokens = [
+                template_token if template_token == token else WILDCARD
+                for template_token, token in zip(best_cluster.tokens, tokens)
+            ]
+
+        best_cluster.add(sample_id)
+        return best_cluster
+
+    def templates(self) -> List[LogCluster]:
+        """Return the clusters, most frequent first."""
+        return sorted(self.clusters, key=lambda cluster: cluster.count, reverse=True)
+
+    def summary(self) -> List[Tuple[str, int, List[str]]]:
+        """Return (template, count, sample ids) of every cluster, most frequent first."""
+        return [
+            (cluster.template, cluster.count, cluster.samples)
+            for cluster in self.templates()
+        ]
+
+
+# function to find the transaction id of a message to use as a template sample.
+def find_sample_id(message: str) -> Optional[str]:
+    match = TRANSACTION_ID_PATTERN.search(message)
+    return match.group(1) if match else None
+
+
+# function to mine the templates of a list of messages in one pass.
+# returns (template, count, sample ids) for every template, most frequent first,
+# the sample id is the transaction id of the message or its position in the list.
+def mine_message_templates(messages):
+    miner = TemplateMiner()
+    for position, message in enumerate(messages, 1):
+        miner.add(message, find_sample_id(message) or f"#{position}")
+    return miner.summary()
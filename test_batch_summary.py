@@ -0,0 +1,24 @@
+import os
+
+from batch_summary import day_labels, expand_day_folders
+
+
+def test_day_folders_with_the_same_name_get_distinct_labels():
+    labels = day_labels(
+        [
+            os.path.join("siteA", "2024-11-20"),
+            os.path.join("siteA", "2024-11-21"),
+            os.path.join("siteB", "2024-11-20"),
+        ]
+    )
+
+    assert labels == ["siteA_2024-11-20", "2024-11-21", "siteB_2024-11-20"]
+
+
+def test_a_day_folder_given_twice_is_summarized_once(tmp_path):
+    day = tmp_path / "2024-11-20"
+    day.mkdir()
+
+    folders = expand_day_folders([str(day), str(tmp_path / "*"), f"{day}{os.sep}"])
+
+    assert folders == [str(day)]
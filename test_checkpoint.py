@@ -0,0 +1,92 @@
+import glob
+import os
+
+from checkpoint import NEW_FILE, RESUMED, ROTATED, TRUNCATED, pending_range
+from process_fund_transfer_logs import process_fund_transfer_logs
+from process_promotexter_logs import BOUNTIPLY_TARGET_MESSAGE, process_promotexter_data
+
+
+def _write(path, lines, mode="w"):
+    with open(path, mode) as f:
+        f.writelines(f"{line}\n" for line in lines)
+
+
+def _rotate(path, lines):
+    os.replace(path, f"{path}.1")
+    _write(path, lines)
+
+
+def _failed_line(txn_id):
+    return (
+        f"2024-11-20 10:00:01 ERROR [fund-transfer] HTTP Status Code: 500 for {txn_id}"
+    )
+
+
+def _sms_line(number):
+    return f"2024-11-20 10:00:01 to {number} {BOUNTIPLY_TARGET_MESSAGE} sent"
+
+
+def _rows(folder, pattern):
+    (path,) = glob.glob(os.path.join(folder, pattern))
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_pending_range_reports_why_it_starts_over(tmp_path):
+    log = str(tmp_path / "ec2.txt")
+    _write(log, [_failed_line("TXN1")])
+    assert pending_range(log)[2] == NEW_FILE
+
+    process_fund_transfer_logs(log, incremental=True)
+    _write(log, [_failed_line("TXN2")], "a")
+    start, end, reason = pending_range(log)
+    assert (reason, start, end) == (
+        RESUMED,
+        len(_failed_line("TXN1")) + 1,
+        os.path.getsize(log),
+    )
+    start, _, reason = pending_range(log, reset=True)
+    assert (reason, start) == (NEW_FILE, 0)
+
+    _write(log, [_failed_line("TXN3")])
+    assert pending_range(log)[2] == TRUNCATED
+
+    _rotate(log, [_failed_line("TXN4")])
+    assert pending_range(log)[2] == ROTATED
+
+
+def test_rotated_fund_transfer_log_keeps_the_earlier_rows(tmp_path):
+    log = str(tmp_path / "ec2.txt")
+    _write(log, [_failed_line("TXN1"), _failed_line("TXN2")])
+    process_fund_transfer_logs(log, incremental=True)
+
+    _rotate(log, [_failed_line("TXN3")])
+    process_fund_transfer_logs(log, incremental=True)
+
+    rows = _rows(tmp_path / "Ec2 Failed Transactions", "*.csv")
+    assert rows == [_failed_line("TXN1"), _failed_line("TXN2"), _failed_line("TXN3")]
+
+
+def test_rotated_promotexter_log_keeps_the_earlier_rows(tmp_path):
+    log = str(tmp_path / "promotexter.txt")
+    _write(log, [_sms_line(1), _sms_line(2)])
+    process_promotexter_data(log, incremental=True)
+
+    _rotate(log, [_sms_line(3)])
+    process_promotexter_data(log, incremental=True)
+
+    rows = _rows(tmp_path / "Promotexter Records", "*.csv")
+    assert len(rows) == 3
+    assert [row.split()[3] for row in rows] == ["1", "2", "3"]
+
+
+def test_reset_overwrites_the_outputs(tmp_path):
+    log = str(tmp_path / "ec2.txt")
+    _write(log, [_failed_line("TXN1")])
+    process_fund_transfer_logs(log, incremental=True)
+
+    _rotate(log, [_failed_line("TXN2")])
+    process_fund_transfer_logs(log, incremental=True, reset=True)
+
+    rows = _rows(tmp_path / "Ec2 Failed Transactions", "*.csv")
+    assert rows == [_failed_line("TXN2")]
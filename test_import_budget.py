@@ -0,0 +1,7 @@
+from benchmark import check_import_budget
+
+
+def test_importing_the_summary_stays_light():
+    seconds, problems = check_import_budget()
+
+    assert problems == [], f"import create_summary took {seconds:.3f}s"
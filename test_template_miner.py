@@ -0,0 +1,45 @@
+from template_miner import TemplateMiner, mine_message_templates
+
+
+def test_distinct_messages_of_the_same_length_keep_their_own_template():
+    miner = TemplateMiner()
+    miner.add("2024-11-20 10:00:01 ERROR [fund-transfer] invalid account for TXN0001")
+    miner.add("2024-11-20 10:00:02 ERROR [fund-transfer] gateway timeout after 30s")
+
+    assert sorted(template for template, _, _ in miner.summary()) == [
+        "<*> <*> ERROR [fund-transfer] gateway timeout after <*>",
+        "<*> <*> ERROR [fund-transfer] invalid account for <*>",
+    ]
+
+
+def test_messages_that_differ_in_their_variables_share_a_template():
+    templates = mine_message_templates(
+        [
+            "2024-11-20 10:00:01 ERROR [fund-transfer] invalid account for TXN0001",
+            "2024-11-20 10:05:09 ERROR [fund-transfer] invalid account for TXN0002",
+            "2024-11-21 11:00:00 ERROR [fund-transfer] invalid account for TXN0003",
+        ]
+    )
+
+    assert templates == [
+        (
+            "<*> <*> ERROR [fund-transfer] invalid account for <*>",
+            3,
+            ["#1", "#2", "#3"],
+        )
+    ]
+
+
+def test_http_status_codes_are_not_masked():
+    templates = mine_message_templates(
+        [
+            "2024-11-20 10:00:01 ERROR HTTP Status Code: 500 for TXN0001",
+            "2024-11-20 10:00:02 ERROR HTTP Status Code: 404 for TXN0002",
+            "2024-11-20 10:00:03 ERROR HTTP Status Code: 500 for TXN0003",
+        ]
+    )
+
+    assert [(template, count) for template, count, _ in templates] == [
+        ("<*> <*> ERROR HTTP Status Code: 500 for <*>", 2),
+        ("<*> <*> ERROR HTTP Status Code: 404 for <*>", 1),
+    ]
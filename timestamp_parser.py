@@ -0,0 +1,109 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
+
+# the fixed YYYY-MM-DD HH:MM:SS layout used by every log source.
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}\s\d{2}:\d{2}:\d{2}", re.ASCII)
+TIMESTAMP_LENGTH = 19
+# the same layout by position, "d" is a digit and "s" a whitespace character as matched by \s.
+TIMESTAMP_LAYOUT = "dddd-dd-ddsdd:dd:dd"
+TIMESTAMP_SPACE_CODES = [ord(character) for character in " \t\n\r\f\v"]
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp_text(text: str) -> datetime:
+    """Parse a YYYY-MM-DD HH:MM:SS timestamp by slicing its digits by position."""
+    # the cache pays off because many log lines share the same second.
+    return datetime(
+        int(text[0:4]),
+        int(text[5:7]),
+        int(text[8:10]),
+        int(text[11:13]),
+        int(text[14:16]),
+        int(text[17:19]),
+    )
+
+
+def parse_timestamp(log_line: str) -> Optional[datetime]:
+    """Return the first timestamp of a log line, None when it has none."""
+    timestamp_match = TIMESTAMP_PATTERN.search(log_line)
+    if timestamp_match:
+        return parse_timestamp_text(timestamp_match.group())
+    return None
+
+
+def parse_timestamp_column(stamps: List[Optional[str]]):
+    """Turn a column of timestamp texts into a datetime64[s] array, NaT where the text is None.
+
+    The digits of every timestamp are sliced by position with numpy, so no
+    string is parsed one by one. Out of range fields are not validated.
+    """
+    import numpy as np
+
+    result = np.full(len(stamps), np.datetime64("NaT"), dtype="datetime64[s]")
+    present = np.array([stamp is not None for stamp in stamps], dtype=bool)
+    if not present.any():
+        return result
+
+    joined = "".join(stamp for stamp in stamps if stamp is not None).encode("ascii")
+    result[present] = parse_timestamp_codes(
+        np.frombuffer(joined, dtype=np.uint8).reshape(-1, TIMESTAMP_LENGTH)
+    )
+    return result
+
+
+def find_timestamp_positions(codes):
+    """Return the start of every timestamp in an array of character codes.
+
+    Only the positions with a "-" where the year ends are checked further, so
+    the whole text is compared once and the other fields only at those places.
+    """
+    import numpy as np
+
+    count = codes.size - TIMESTAMP_LENGTH + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    starts = np.flatnonzero(codes[4 : 4 + count] == ord("-"))
+    for offset, kind in enumerate(TIMESTAMP_LAYOUT):
+        if offset == 4 or not starts.size:
+            continue
+        column = codes[starts + offset]
+        if kind == "d":
+            keep = (column >= ord("0")) & (column <= ord("9"))
+        elif kind == "s":
+            keep = np.isin(column, TIMESTAMP_SPACE_CODES)
+        else:
+            keep = column == ord(kind)
+        starts = starts[keep]
+    return starts
+
+
+def parse_timestamp_codes(digits):
+    """Turn rows of timestamp character codes, one timestamp per row, into a datetime64[s] array."""
+    import numpy as np
+
+    digits = digits.astype(np.int64) - ord("0")
+
+    def field(start, end):
+        value = digits[:, start]
+        for position in range(start + 1, end):
+            value = value * 10 + digits[:, position]
+        return value
+
+    year, month, day = field(0, 4), field(5, 7), field(8, 10)
+    seconds = field(11, 13) * 3600 + field(14, 16) * 60 + field(17, 19)
+
+    months = ((year - 1970) * 12 + (month - 1)).astype("datetime64[M]")
+    days = months.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    return days.astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+
+
+def parse_timestamps(log_lines: List[str]):
+    """Return the first timestamp of every log line as a datetime64[s] array."""
+    stamps = []
+    for log_line in log_lines:
+        timestamp_match = TIMESTAMP_PATTERN.search(log_line)
+        stamps.append(timestamp_match.group() if timestamp_match else None)
+    return parse_timestamp_column(stamps)